@@ -1,6 +1,10 @@
 import streamlit as st
 import pandas as pd
 from market_engine import UdemyMarketEngine
+from parallel_config import apply_thread_limits
+
+# Cap BLAS/OpenMP pools per server process (UDEMY_BLAS_THREADS)
+apply_thread_limits()
 
 # 1. Setup the Page
 st.set_page_config(page_title="Udemy Strategy Optimizer", page_icon="🎓")
@@ -10,9 +14,8 @@ st.markdown("Enter your course details below to predict market performance.")
 # 2. Load the Engine (Cached so it doesn't reload every click)
 @st.cache_resource
 def load_engine():
-    engine = UdemyMarketEngine()
-    engine.preprocess_and_train()
-    return engine
+    # Skips training when the saved artifact matches the current CSV
+    return UdemyMarketEngine.load_or_train(cache_size=1024)
 
 try:
     engine = load_engine()
@@ -39,7 +42,10 @@ if st.button("Predict Success"):
     # Display Results
     st.divider()
     st.metric(label="Predicted Subscribers", value=f"{result['prediction_int']:,}")
-    st.metric(label="Market Performance", value=f"{result['percentile']:.1f}% of average")
+    st.metric(label="Market Performance", value=f"{result['percent_of_average']:.1f}% of average")
+    st.metric(label="Market Percentile", value=f"{result['percentile']:.1f}")
+    if result['segment_percentile'] is not None:
+        st.metric(label=f"Percentile in {subject} / {level}", value=f"{result['segment_percentile']:.1f}")
     
     # Logic for Advice (Visualized)
     if result['prediction'] > 5000:
@@ -53,3 +59,25 @@ if st.button("Predict Success"):
         st.subheader("💡 Strategic Recommendations")
         for msg in result['advice']:
             st.info(msg)
+
+    # Evidence: the closest existing courses by title
+    comparables = engine.similar_courses(title, k=5, subject=subject)
+    if comparables:
+        st.subheader("🔎 Comparable Courses")
+        st.dataframe(pd.DataFrame(comparables), hide_index=True)
+
+    # Price what-if: one engine call covers every price/subject/level combination
+    st.subheader("📈 Price What-If")
+    surface = engine.price_response_surface(title)["surface"]
+    mine = surface[surface["subject"] == subject]
+    st.caption(f"Predicted subscribers by price for {subject}, one line per level")
+    st.line_chart(mine.pivot(index="price", columns="level", values="prediction"))
+
+    segment = mine[mine["level"] == level]
+    best = segment.loc[segment["revenue"].idxmax()]
+    st.line_chart(segment.set_index("price")["revenue"])
+    st.metric(
+        label=f"Revenue-maximizing price ({level})",
+        value=f"${best['price']:.2f}",
+        delta=f"~{int(best['prediction']):,} subscribers",
+    )
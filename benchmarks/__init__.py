@@ -0,0 +1,4 @@
+"""Load/clean/train/predict benchmarks at several catalog sizes.
+
+Run ``python -m benchmarks --help`` from the repository root.
+"""
@@ -0,0 +1,148 @@
+"""Benchmark load, clean, feature, train and predict stages at several catalog sizes.
+
+    python -m benchmarks --sizes 3600 100000 1000000 --repeats 5 \\
+        --output benchmark_results.json --baseline benchmarks/baseline.json
+
+Catalogs of each size are generated by ``synthetic_catalog`` into a
+temporary directory, with distributions fit from ``--data`` when it exists.
+``read_csv`` is pandas' CSV parsing alone; ``load_uncached`` is
+udemy_analysis.load_data without the cache (parse, typed schema and dtype
+compaction); ``load_cached`` reads the dataset_cache copy. Stage names are
+fixed so reports stay comparable; parameters such as the prediction batch
+size are stored as separate fields.
+Results (wall/CPU percentiles and peak traced memory per stage) are written
+as JSON; with ``--baseline`` the run exits non-zero when a
+stage's median wall time regressed by more than ``--tolerance``.
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+import udemy_analysis
+from market_engine import DATA_FILE, UdemyMarketEngine
+from parallel_config import get_config
+from synthetic_catalog import CatalogProfile, write_catalog
+
+from .harness import compare, environment, load_report, measure, write_report
+
+DEFAULT_SIZES = (3_600, 100_000, 1_000_000)
+
+
+def bench_size(path, n_rows, args):
+    results = []
+
+    def record(stage, stats, **fields):
+        row = {"size": n_rows, "stage": stage, **fields, **stats}
+        results.append(row)
+        peak = f"{stats['peak_mb']:.1f} MB" if stats["peak_mb"] is not None else "-"
+        print(
+            f"  {stage:<22} p50 {stats['wall_s']['p50'] * 1e3:10.3f} ms"
+            f"   p90 {stats['wall_s']['p90'] * 1e3:10.3f} ms   peak {peak}"
+        )
+
+    stats, _ = measure(lambda: pd.read_csv(path), args.repeats)
+    record("read_csv", stats)
+    stats, raw = measure(
+        lambda: udemy_analysis.load_data(str(path), cache=False), args.repeats
+    )
+    record("load_uncached", stats)
+    udemy_analysis.load_data(str(path))  # builds the columnar cache
+    stats, _ = measure(lambda: udemy_analysis.load_data(str(path)), args.repeats)
+    record("load_cached", stats)
+    stats, clean = measure(lambda: udemy_analysis.clean_and_cast(raw), args.repeats)
+    record("clean_and_cast", stats)
+    stats, _ = measure(lambda: udemy_analysis.add_features(clean), args.repeats)
+    record("add_features", stats)
+
+    if args.max_train_rows is not None and n_rows > args.max_train_rows:
+        print(f"  (skipping train/predict stages above {args.max_train_rows:,} rows)")
+        return results
+
+    stats, engine = measure(
+        lambda engine: (engine.preprocess_and_train(), engine)[1],
+        args.train_repeats,
+        setup=lambda: UdemyMarketEngine(
+            data_path=str(path), parallel=get_config(), backend=args.backend
+        ),
+        track_memory=not args.no_train_memory,
+    )
+    record("preprocess_and_train", stats)
+
+    courses = raw.sample(min(args.batch_size, len(raw)), random_state=0, replace=False)
+    first = courses.iloc[0]
+    stats, _ = measure(
+        lambda: engine.predict_course(
+            first["course_title"], first["price"], first["subject"], first["level"]
+        ),
+        args.repeats,
+        inner=args.single_calls,
+    )
+    record("predict_course", stats)
+
+    batch = courses.rename(columns={"course_title": "title"})[
+        ["title", "price", "subject", "level"]
+    ]
+    stats, _ = measure(lambda: engine.predict_courses(batch), args.repeats)
+    record("predict_courses", stats, batch_size=len(batch))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("--data", default=DATA_FILE, help="real catalog to fit the generator on")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--train-repeats", type=int, default=1)
+    parser.add_argument("--single-calls", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--max-train-rows", type=int, default=None)
+    parser.add_argument(
+        "--no-train-memory", action="store_true", help="skip the extra traced training run"
+    )
+    parser.add_argument("--backend", default=None, help="model backend to train")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None, help="earlier JSON report to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if Path(args.data).exists():
+        profile = CatalogProfile.from_csv(args.data)
+    else:
+        print(f"[Bench] {args.data} not found, using the default catalog profile")
+        profile = CatalogProfile.default()
+
+    report = {"environment": environment(), "config": vars(args), "results": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.sizes:
+            print(f"[Bench] {n_rows:,} rows")
+            path = write_catalog(
+                Path(tmp) / f"catalog_{n_rows}.csv", n_rows, seed=args.seed, profile=profile
+            )
+            report["results"].extend(bench_size(path, n_rows, args))
+
+    write_report(report, args.output)
+    print(f"[Bench] Results -> {args.output}")
+
+    if args.baseline:
+        regressions = compare(report, load_report(args.baseline), args.tolerance)
+        for r in regressions:
+            print(
+                f"[Regression] {r['stage']} @ {r['size']:,} rows: "
+                f"{r['baseline'] * 1e3:.3f} ms -> {r['current'] * 1e3:.3f} ms "
+                f"(x{r['ratio']:.2f})"
+            )
+        if regressions:
+            return 1
+        print(f"[Bench] No regressions beyond {args.tolerance:.0%} vs {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Timing, memory and baseline-comparison helpers for the benchmark suite."""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+
+
+def summarize(samples):
+    samples = np.asarray(samples, dtype=float)
+    out = {f"p{q}": float(np.percentile(samples, q)) for q in PERCENTILES}
+    out.update(
+        mean=float(samples.mean()),
+        min=float(samples.min()),
+        max=float(samples.max()),
+    )
+    return out
+
+
+def measure(fn, repeats=3, setup=None, inner=1, track_memory=True):
+    """Time ``fn`` over ``repeats`` runs, then profile peak memory in one extra run.
+
+    ``setup`` (if given) builds fresh arguments before every run and is not
+    timed; its return value is passed to ``fn``. ``inner`` calls are made per
+    run and reported per call, for sub-millisecond stages. Output printed by
+    the code under test is swallowed. Returns wall/cpu summaries in seconds
+    and peak traced memory in MB (Python and NumPy allocations; memory that
+    compiled estimators allocate natively is not traced).
+    """
+    wall, cpu = [], []
+    result = None
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            args = setup() if setup else None
+            w0, c0 = time.perf_counter(), time.process_time()
+            for _ in range(inner):
+                result = fn(args) if setup else fn()
+            wall.append((time.perf_counter() - w0) / inner)
+            cpu.append((time.process_time() - c0) / inner)
+
+    peak_mb = None
+    if track_memory:
+        # Separate run: tracemalloc slows allocation-heavy code noticeably
+        with contextlib.redirect_stdout(io.StringIO()):
+            args = setup() if setup else None
+            tracemalloc.start()
+            try:
+                fn(args) if setup else fn()
+                peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+            finally:
+                tracemalloc.stop()
+
+    return {
+        "repeats": repeats,
+        "inner": inner,
+        "wall_s": summarize(wall),
+        "cpu_s": summarize(cpu),
+        "peak_mb": peak_mb,
+    }, result
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=False,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit or None,
+    }
+
+
+def write_report(report, path):
+    with open(path, "w") as fh:
+        json.dump(report, fh, indent=2)
+
+
+def load_report(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def compare(current, baseline, tolerance=0.2, metric="p50"):
+    """Stages whose wall-time ``metric`` grew by more than ``tolerance`` vs baseline.
+
+    Returns a list of dicts (size, stage, baseline, current, ratio); stages
+    missing from either report are ignored.
+    """
+    base = {(r["size"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        ref = base.get((row["size"], row["stage"]))
+        if ref is None:
+            continue
+        before, after = ref["wall_s"][metric], row["wall_s"][metric]
+        if before > 0 and after > before * (1 + tolerance):
+            regressions.append(
+                {
+                    "size": row["size"],
+                    "stage": row["stage"],
+                    "baseline": before,
+                    "current": after,
+                    "ratio": after / before,
+                }
+            )
+    return regressions
@@ -0,0 +1,83 @@
+"""Cold-start cost of the entry points: import time per package and time to first prediction.
+
+    python -m benchmarks.startup --repeats 5
+
+Every scenario runs in a fresh interpreter. The breakdown sums ``python -X
+importtime`` self times by top-level package, so it shows which dependency
+each entry point pays for.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from market_engine import COMPILED_MODEL_FILE, MODEL_FILE
+
+_FIRST_PREDICTION = (
+    "from market_engine import UdemyMarketEngine; "
+    "UdemyMarketEngine.load({path!r}).predict_course("
+    "'Complete Python Bootcamp', 19.99, 'Web Development', 'All Levels')"
+)
+_TIMED = (
+    "import time; _t = time.perf_counter(); {code}; "
+    "print('STARTUP_MS', (time.perf_counter() - _t) * 1e3)"
+)
+
+
+def scenarios(full_model, compiled_model):
+    yield "import market_engine", "import market_engine"
+    yield "import udemy_analysis", "import udemy_analysis"
+    yield "import serve", "import serve"
+    for label, path in (("full", full_model), ("compiled", compiled_model)):
+        if Path(path).exists():
+            yield f"load {label} + predict", _FIRST_PREDICTION.format(path=str(path))
+        else:
+            print(f"[Startup] {path} not found; skipping 'load {label} + predict'")
+
+
+def run(code, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    return subprocess.run(cmd, capture_output=True, text=True, check=True)
+
+
+def wall_ms(code, repeats):
+    samples = []
+    for _ in range(repeats):
+        out = run(_TIMED.format(code=code)).stdout
+        samples.append(float(out.rsplit("STARTUP_MS", 1)[1]))
+    return statistics.median(samples)
+
+
+def import_breakdown(code, top=8):
+    """(package, ms) pairs: summed -X importtime self time per top-level package."""
+    totals = defaultdict(float)
+    for line in run(code, importtime=True).stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us) / 1e3
+    return sorted(totals.items(), key=lambda kv: -kv[1])[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.startup", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("--model", default=MODEL_FILE, help="full artifact")
+    parser.add_argument("--compiled-model", default=COMPILED_MODEL_FILE)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="packages per breakdown")
+    args = parser.parse_args(argv)
+
+    for label, code in scenarios(args.model, args.compiled_model):
+        ms = wall_ms(code, args.repeats)
+        breakdown = ", ".join(f"{pkg} {t:.0f}" for pkg, t in import_breakdown(code, args.top))
+        print(f"{label:<24} {ms:8.0f} ms   imports (ms): {breakdown}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
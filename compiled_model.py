@@ -0,0 +1,255 @@
+"""Prediction-only stand-ins for the fitted scikit-learn parts of UdemyMarketEngine.
+
+A compiled artifact (``engine.save(path, compiled=True)``) swaps the forest,
+the TF-IDF vectorizer and the label encoders for the classes below, which
+hold plain NumPy arrays and dicts. Loading one never imports scikit-learn,
+so a prediction-only process starts in a fraction of the time a full
+artifact takes, and scores the same numbers.
+"""
+
+import re
+
+import numpy as np
+from scipy import sparse
+
+TOKEN_PATTERN = r"(?u)\b\w\w+\b"  # scikit-learn's default
+
+
+def word_analyzer(stop_words=frozenset(), ngram_range=(1, 1), token_pattern=TOKEN_PATTERN):
+    """Callable matching scikit-learn's default ``analyzer="word"`` pipeline.
+
+    Lowercase, regex tokenize, drop stop words, then join n-grams with
+    spaces, in the same order scikit-learn emits them.
+    """
+    find_tokens = re.compile(token_pattern).findall
+    min_n, max_n = ngram_range
+
+    def analyze(doc):
+        tokens = [t for t in find_tokens(doc.lower()) if t not in stop_words]
+        if max_n == 1:
+            return tokens
+        grams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            grams.extend(" ".join(tokens[i : i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    return analyze
+
+
+class FittedClasses:
+    """The ``classes_`` of a fitted LabelEncoder, without the encoder."""
+
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes, dtype=object)
+
+
+class CompiledVectorizer:
+    """TF-IDF transform (raw counts x idf, L2-normalised) from a fitted TfidfVectorizer."""
+
+    def __init__(self, vocabulary, idf, stop_words, token_pattern=TOKEN_PATTERN):
+        self.vocabulary_ = dict(vocabulary)
+        self.idf_ = np.asarray(idf, dtype=np.float64)
+        self.stop_words = frozenset(stop_words or ())
+        self.token_pattern = token_pattern
+        self._analyzer = None
+
+    @classmethod
+    def from_tfidf(cls, vectorizer):
+        params = vectorizer.get_params()
+        expected = {
+            "analyzer": "word",
+            "ngram_range": (1, 1),
+            "lowercase": True,
+            "preprocessor": None,
+            "tokenizer": None,
+            "strip_accents": None,
+            "binary": False,
+            "norm": "l2",
+            "use_idf": True,
+            "sublinear_tf": False,
+        }
+        changed = [k for k, v in expected.items() if params[k] != v]
+        if changed:
+            raise ValueError(f"Cannot compile a TfidfVectorizer with custom {changed}")
+        return cls(
+            vectorizer.vocabulary_,
+            vectorizer.idf_,
+            vectorizer.get_stop_words(),
+            params["token_pattern"],
+        )
+
+    def build_analyzer(self):
+        if self._analyzer is None:
+            self._analyzer = word_analyzer(self.stop_words, token_pattern=self.token_pattern)
+        return self._analyzer
+
+    def get_feature_names_out(self):
+        terms = np.empty(len(self.vocabulary_), dtype=object)
+        for term, j in self.vocabulary_.items():
+            terms[j] = term
+        return terms
+
+    def transform(self, docs):
+        analyze = self.build_analyzer()
+        vocab = self.vocabulary_
+        indptr, indices, data = [0], [], []
+        for doc in docs:
+            counts = {}
+            for token in analyze(doc):
+                j = vocab.get(token)
+                if j is not None:
+                    counts[j] = counts.get(j, 0) + 1
+            for j in sorted(counts):
+                indices.append(j)
+                data.append(counts[j])
+            indptr.append(len(indices))
+
+        indices = np.asarray(indices, dtype=np.int32)
+        data = np.asarray(data, dtype=np.float64) * self.idf_[indices]
+        indptr = np.asarray(indptr, dtype=np.int32)
+        # Row-wise L2 normalisation; rows without known terms stay empty
+        row_of = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        norms = np.sqrt(np.bincount(row_of, weights=data**2, minlength=len(indptr) - 1))
+        data /= norms[row_of]
+        return sparse.csr_matrix(
+            (data, indices, indptr), shape=(len(indptr) - 1, len(self.idf_))
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_analyzer"] = None  # rebuilt on first use
+        return state
+
+
+class CompiledForest:
+    """A fitted forest or boosted ensemble flattened into node arrays.
+
+    Every tree's nodes are concatenated; leaves point to themselves (with an
+    infinite threshold) so all rows can step through the deepest tree's depth
+    in lockstep with vectorised NumPy gathers. Random forests average the
+    leaf values, boosted models add them to the baseline.
+    """
+
+    chunk_rows = 4096
+
+    def __init__(self, trees, combine, baseline=0.0, input_dtype=np.float32, importances=None):
+        sizes = [len(t["value"]) for t in trees]
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+        left, right, feature, threshold, value, missing = [], [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            leaf = tree["is_leaf"]
+            own = np.arange(len(leaf)) + offset
+            left.append(np.where(leaf, own, tree["left"] + offset))
+            right.append(np.where(leaf, own, tree["right"] + offset))
+            feature.append(np.where(leaf, 0, tree["feature"]))
+            threshold.append(np.where(leaf, np.inf, tree["threshold"]))
+            value.append(tree["value"])
+            missing.append(tree["missing_left"] & ~leaf)
+
+        self.roots = offsets
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = np.concatenate(threshold).astype(np.float64)
+        self.value = np.concatenate(value).astype(np.float64)
+        self.missing_left = np.concatenate(missing).astype(bool)
+        self.max_depth = max(t["depth"] for t in trees)
+        self.combine = combine
+        self.baseline = float(baseline)
+        self.input_dtype = np.dtype(input_dtype)
+        self.feature_importances_ = importances
+
+    @classmethod
+    def from_estimator(cls, model):
+        """Compile a fitted RandomForestRegressor or HistGradientBoostingRegressor."""
+        if hasattr(model, "estimators_"):
+            trees = []
+            for estimator in model.estimators_:
+                t = estimator.tree_
+                missing = getattr(t, "missing_go_to_left", None)
+                trees.append(
+                    {
+                        "left": t.children_left,
+                        "right": t.children_right,
+                        "feature": t.feature,
+                        "threshold": t.threshold,
+                        "value": t.value[:, 0, 0],
+                        "is_leaf": t.children_left == -1,
+                        "missing_left": (
+                            np.zeros(t.node_count, dtype=bool)
+                            if missing is None
+                            else np.asarray(missing, dtype=bool)
+                        ),
+                        "depth": t.max_depth,
+                    }
+                )
+            # Trees compare float32 inputs against float64 thresholds
+            return cls(
+                trees,
+                "mean",
+                input_dtype=np.float32,
+                importances=getattr(model, "feature_importances_", None),
+            )
+
+        if hasattr(model, "_predictors"):
+            if model.loss != "squared_error":
+                raise ValueError(f"Cannot compile a {model.loss!r} boosting model")
+            trees = []
+            for (predictor,) in model._predictors:
+                nodes = predictor.nodes
+                if nodes["is_categorical"].any():
+                    raise ValueError("Cannot compile categorical splits")
+                trees.append(
+                    {
+                        "left": nodes["left"].astype(np.intp),
+                        "right": nodes["right"].astype(np.intp),
+                        "feature": nodes["feature_idx"],
+                        "threshold": nodes["num_threshold"],
+                        "value": nodes["value"],
+                        "is_leaf": nodes["is_leaf"].astype(bool),
+                        "missing_left": nodes["missing_go_to_left"].astype(bool),
+                        "depth": int(nodes["depth"].max()),
+                    }
+                )
+            baseline = np.ravel(model._baseline_prediction)[0]
+            return cls(trees, "sum", baseline=baseline, input_dtype=np.float64)
+
+        raise TypeError(f"Cannot compile a {type(model).__name__}")
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def predict(self, X):
+        # Sparse input stays sparse; only one chunk_rows slice is densified at a time
+        if hasattr(X, "toarray"):
+            X = X.tocsr()
+        else:
+            X = np.asarray(X, dtype=self.input_dtype)
+            if X.ndim == 1:
+                X = X[None, :]
+        n_rows = X.shape[0]
+        out = np.empty(n_rows)
+        for start in range(0, n_rows, self.chunk_rows):
+            chunk = X[start : start + self.chunk_rows]
+            if hasattr(chunk, "toarray"):
+                chunk = chunk.toarray().astype(self.input_dtype, copy=False)
+            out[start : start + self.chunk_rows] = self._predict_chunk(chunk)
+        return out
+
+    def _predict_chunk(self, X):
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        has_nan = np.isnan(X).any()
+        for _ in range(self.max_depth):
+            values = X[rows, self.feature[node]]
+            go_left = values <= self.threshold[node]
+            if has_nan:
+                go_left |= np.isnan(values) & self.missing_left[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        leaves = self.value[node]
+        # Accumulate tree by tree, as scikit-learn does, for bit-identical output
+        if self.combine == "mean":
+            return np.cumsum(leaves, axis=1)[:, -1] / self.n_trees
+        leaves[:, 0] += self.baseline
+        return np.cumsum(leaves, axis=1)[:, -1]
@@ -0,0 +1,298 @@
+"""Typed columnar cache of catalog CSVs, shared by the engine, udemy_analysis and scripts.
+
+The first load of a CSV parses it once, coerces the known columns to the
+types in ``SCHEMA`` and writes an uncompressed Feather (Arrow IPC) file;
+later loads memory-map that file and read only the requested columns. The
+cache is reused while the source's size and mtime are unchanged (or, after a
+touch, while its SHA-256 still matches) and rebuilt otherwise.
+
+Loaded frames are then compacted (``compact_frame``): low-cardinality text
+becomes ``category``, integers and floats are downcast where no value
+changes, and the remaining text uses Arrow-backed strings. Settings:
+
+    UDEMY_CACHE_DIR      where cache files go (default: .udemy_cache beside the CSV)
+    UDEMY_DATA_CACHE     0 to always parse the CSV
+    UDEMY_COMPACT        0 to keep the wide dtypes
+    UDEMY_ARROW_STRINGS  0 to leave text columns as loaded
+
+Feather and Arrow strings need pyarrow; without it every load parses the CSV
+(still typed and compacted, with object strings).
+
+    python dataset_cache.py udemy_courses.csv   # per-column memory before/after
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Bump when SCHEMA or apply_schema change so existing caches are rebuilt
+SCHEMA_VERSION = 1
+SCHEMA = {
+    "course_id": "int",
+    "course_title": "str",
+    "url": "str",
+    "is_paid": "bool",
+    "price": "float",
+    "num_subscribers": "int",
+    "num_reviews": "int",
+    "num_lectures": "int",
+    "level": "str",
+    "content_duration": "float",
+    "published_timestamp": "datetime",
+    "subject": "str",
+}
+_BOOLS = {"true": True, "false": False, "1": True, "0": False}
+# Text columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_RATIO = 0.5
+_warned_no_arrow = False
+
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """SHA-256 of a file's bytes, streamed so large CSVs are not held in memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_stamp(path):
+    """Size, mtime and SHA-256 of ``path``, as compared by source_unchanged."""
+    stat = Path(path).stat()
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_fingerprint(path),
+    }
+
+
+def source_unchanged(path, stamp):
+    """True if ``path`` still matches ``stamp`` (a dict with source_stamp's keys).
+
+    Size and mtime are compared first; the file is only hashed when the
+    mtime moved. If the content turns out unchanged (a touch),
+    ``stamp["mtime_ns"]`` is updated in place so callers can persist it.
+    """
+    stat = Path(path).stat()
+    if stamp.get("size") != stat.st_size:
+        return False
+    if stamp.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    if stamp.get("sha256") != file_fingerprint(path):
+        return False
+    stamp["mtime_ns"] = stat.st_mtime_ns
+    return True
+
+
+def apply_schema(df):
+    """Coerce known columns in place: numbers (unparseable -> NaN), bools, UTC timestamps.
+
+    Integer columns stay int64 unless they have gaps (then float64, as
+    read_csv would do); bool columns with unrecognised values stay object.
+    """
+    for col, kind in SCHEMA.items():
+        if col not in df:
+            continue
+        values = df[col]
+        if kind in ("int", "float"):
+            values = pd.to_numeric(values, errors="coerce")
+            if kind == "int" and values.notna().all():
+                values = values.astype("int64")
+        elif kind == "bool" and values.dtype != bool:
+            mapped = values.astype(str).str.strip().str.lower().map(_BOOLS)
+            values = mapped.astype(bool) if mapped.notna().all() else values
+        elif kind == "datetime":
+            values = pd.to_datetime(values, errors="coerce", utc=True)
+        df[col] = values
+    return df
+
+
+def _arrow_string_dtype():
+    """Arrow string dtype with NaN for missing values (pandas 3's ``str``), if available."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)  # pandas >= 2.3
+    except TypeError:
+        try:
+            return pd.StringDtype("pyarrow_numpy")  # pandas 2.1 / 2.2
+        except (TypeError, ValueError):
+            return None
+
+
+def compact_frame(df, arrow_strings=None, category_max_ratio=CATEGORY_MAX_RATIO):
+    """Copy of ``df`` with narrower dtypes; values and missing entries are unchanged.
+
+    Integers that fit become int32 (not smaller, so ordinary arithmetic does
+    not overflow) and floats become float32 only if every value round-trips
+    exactly. Text columns with few distinct values become ``category``;
+    other text uses Arrow-backed strings unless ``arrow_strings`` is False
+    (default: UDEMY_ARROW_STRINGS).
+    """
+    if arrow_strings is None:
+        arrow_strings = os.environ.get("UDEMY_ARROW_STRINGS", "1") != "0"
+    string_dtype = _arrow_string_dtype() if arrow_strings else None
+    df = df.copy(deep=False)
+    for col in df.columns:
+        values = df[col]
+        dtype = values.dtype
+        if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_integer_dtype(dtype):
+            limits = np.iinfo(np.int32)
+            if dtype.itemsize > 4 and (
+                values.empty or (values.min() >= limits.min and values.max() <= limits.max)
+            ):
+                df[col] = values.astype(np.int32)
+        elif pd.api.types.is_float_dtype(dtype):
+            if dtype.itemsize > 4:
+                with np.errstate(over="ignore"):
+                    narrow = values.astype(np.float32)
+                if np.array_equal(narrow.to_numpy(np.float64), values.to_numpy(), equal_nan=True):
+                    df[col] = narrow
+        elif pd.api.types.is_string_dtype(dtype):
+            if values.nunique() <= category_max_ratio * len(values):
+                df[col] = values.astype("category")
+            elif string_dtype is not None and dtype != string_dtype:
+                df[col] = values.astype(string_dtype)
+    return df
+
+
+def memory_report(before, after):
+    """Per-column dtype and deep memory (bytes) of two versions of a frame, with a total row."""
+    report = pd.DataFrame(
+        {
+            "dtype_before": before.dtypes.astype(str),
+            "dtype_after": after.dtypes.astype(str),
+            "bytes_before": before.memory_usage(deep=True, index=False),
+            "bytes_after": after.memory_usage(deep=True, index=False),
+        }
+    )
+    report.loc["total"] = ["", "", report["bytes_before"].sum(), report["bytes_after"].sum()]
+    report["ratio"] = (report["bytes_before"] / report["bytes_after"]).round(2)
+    return report
+
+
+def cache_paths(source):
+    source = Path(source).resolve()
+    cache_dir = Path(os.environ.get("UDEMY_CACHE_DIR") or source.parent / ".udemy_cache")
+    # Hash the full path so same-named CSVs in different folders do not collide
+    tag = hashlib.sha1(str(source).encode()).hexdigest()[:8]
+    stem = f"{source.stem}-{tag}"
+    return cache_dir / f"{stem}.feather", cache_dir / f"{stem}.meta.json"
+
+
+def _cache_enabled(cache):
+    if cache is not None:
+        return cache
+    return os.environ.get("UDEMY_DATA_CACHE", "1") != "0"
+
+
+def _have_arrow():
+    global _warned_no_arrow
+    try:
+        import pyarrow.feather  # noqa: F401
+    except ImportError:
+        if not _warned_no_arrow:
+            print("[Cache] pyarrow not installed; parsing CSVs without a cache.")
+            _warned_no_arrow = True
+        return False
+    return True
+
+
+def _is_current(source, data_path, meta_path):
+    """True if the cache matches the source; refreshes the stat after a touch."""
+    if not (data_path.exists() and meta_path.exists()):
+        return False
+    try:
+        meta = json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        return False
+    if meta.get("schema_version") != SCHEMA_VERSION:
+        return False
+    mtime_ns = meta.get("mtime_ns")
+    if not source_unchanged(source, meta):
+        return False
+    if meta["mtime_ns"] != mtime_ns:
+        meta_path.write_text(json.dumps(meta))
+    return True
+
+
+def build_cache(source):
+    """Parse ``source`` once, apply SCHEMA and write its Feather cache; returns the path."""
+    from pyarrow import feather
+
+    source = Path(source)
+    data_path, meta_path = cache_paths(source)
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    stat = source.stat()
+    df = apply_schema(pd.read_csv(source))
+
+    # Write under temporary names and swap in, so readers never see half a file
+    tmp = data_path.with_suffix(f".{os.getpid()}.tmp")
+    feather.write_feather(df.reset_index(drop=True), tmp, compression="uncompressed")
+    os.replace(tmp, data_path)
+    meta = {
+        "source": str(source.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_fingerprint(source),
+        "schema_version": SCHEMA_VERSION,
+        "rows": len(df),
+    }
+    tmp = meta_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, meta_path)
+    print(f"[Cache] {source} -> {data_path} ({len(df):,} rows)")
+    return data_path
+
+
+def load_catalog(path, columns=None, cache=None, compact=None):
+    """Typed catalog DataFrame from ``path``, through the columnar cache when possible.
+
+    ``columns`` limits what is read (only those columns are materialised from
+    the cache). ``cache`` overrides UDEMY_DATA_CACHE and ``compact`` overrides
+    UDEMY_COMPACT. Raises FileNotFoundError if the CSV does not exist.
+    """
+    source = Path(path)
+    if not source.exists():
+        raise FileNotFoundError(f"No such catalog: {path}")
+    columns = list(columns) if columns is not None else None
+    if not (_cache_enabled(cache) and _have_arrow()):
+        df = apply_schema(pd.read_csv(source, usecols=columns))
+    else:
+        from pyarrow import feather
+
+        data_path, meta_path = cache_paths(source)
+        if not _is_current(source, data_path, meta_path):
+            build_cache(source)
+        df = feather.read_table(data_path, columns=columns, memory_map=True).to_pandas()
+
+    if compact is None:
+        compact = os.environ.get("UDEMY_COMPACT", "1") != "0"
+    return compact_frame(df) if compact else df
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-column memory of a catalog before and after compaction."
+    )
+    parser.add_argument("source")
+    parser.add_argument("--no-arrow-strings", action="store_true")
+    args = parser.parse_args()
+
+    before = load_catalog(args.source, compact=False)
+    after = compact_frame(before, arrow_strings=not args.no_arrow_strings)
+    with pd.option_context("display.width", 120, "display.max_columns", None):
+        print(memory_report(before, after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Per-stage wall time, CPU time and peak memory for market_engine.
+
+Stages are timed with ``registry.stage(name)``; the process-wide registry is
+off by default, in which case ``stage`` hands back a shared no-op context
+manager and nothing is recorded. Settings come from the environment:
+
+    UDEMY_METRICS         1 to record stage timings
+    UDEMY_METRICS_MEMORY  1 to also trace peak memory per stage (tracemalloc;
+                          slows allocation-heavy stages, use when profiling)
+
+Recorded stages can be read with ``snapshot()`` or exported in the
+Prometheus text format with ``to_prometheus()``.
+"""
+
+import os
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, Optional
+
+# Upper bounds (seconds) of the wall-time histogram buckets
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+_NOOP = nullcontext()
+
+
+class StageStats:
+    """Running totals for one stage: calls, wall/CPU seconds, max peak memory."""
+
+    __slots__ = ("count", "wall_s", "cpu_s", "wall_max_s", "peak_bytes", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.wall_max_s = 0.0
+        self.peak_bytes: Optional[int] = None
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+
+    def add(self, wall: float, cpu: float, peak: Optional[int]) -> None:
+        self.count += 1
+        self.wall_s += wall
+        self.cpu_s += cpu
+        self.wall_max_s = max(self.wall_max_s, wall)
+        self.buckets[bisect_left(BUCKETS, wall)] += 1
+        if peak is not None:
+            self.peak_bytes = peak if self.peak_bytes is None else max(self.peak_bytes, peak)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "wall_s": self.wall_s,
+            "cpu_s": self.cpu_s,
+            "wall_mean_s": self.wall_s / self.count if self.count else 0.0,
+            "wall_max_s": self.wall_max_s,
+            "peak_mb": None if self.peak_bytes is None else self.peak_bytes / 2**20,
+        }
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = False, track_memory: bool = False) -> None:
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self._stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_tracing = False
+
+    @classmethod
+    def from_env(cls) -> "MetricsRegistry":
+        return cls(
+            enabled=os.environ.get("UDEMY_METRICS") == "1",
+            track_memory=os.environ.get("UDEMY_METRICS_MEMORY") == "1",
+        )
+
+    def stage(self, name: str):
+        """Context manager timing one run of ``name``; a no-op when disabled."""
+        if not self.enabled:
+            return _NOOP
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name: str) -> Iterator[None]:
+        frame = self._enter_memory() if self.track_memory else None
+        w0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - w0
+            cpu = time.process_time() - c0
+            peak = self._exit_memory(frame) if frame is not None else None
+            self.record(name, wall, cpu, peak)
+
+    def record(self, name: str, wall: float, cpu: float = 0.0, peak_bytes: Optional[int] = None):
+        with self._lock:
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = self._stages[name] = StageStats()
+            stats.add(wall, cpu, peak_bytes)
+
+    def _enter_memory(self) -> list:
+        # tracemalloc keeps one process-wide peak, so nested stages hand their
+        # peak to the enclosing stage before resetting it. Stages running on
+        # other threads at the same time share (and inflate) each other's peak.
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        current, peak = tracemalloc.get_traced_memory()
+        stack = self._local.__dict__.setdefault("stack", [])
+        if stack:
+            stack[-1][1] = max(stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        frame = [current, current]  # [traced bytes at entry, highest traced since]
+        stack.append(frame)
+        return frame
+
+    def _exit_memory(self, frame: list) -> int:
+        frame[1] = max(frame[1], tracemalloc.get_traced_memory()[1])
+        stack = self._local.stack
+        stack.pop()
+        if stack:
+            stack[-1][1] = max(stack[-1][1], frame[1])
+        return frame[1] - frame[0]
+
+    def stop_tracing(self) -> None:
+        """Stop tracemalloc if this registry started it (tracing slows every allocation)."""
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracing = False
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Per-stage totals keyed by stage name."""
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in sorted(self._stages.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+    def to_prometheus(self, prefix: str = "udemy_stage") -> str:
+        """All stages in the Prometheus text exposition format."""
+        with self._lock:
+            stages = sorted(self._stages.items())
+            wall = [f"# HELP {prefix}_wall_seconds Wall-clock time per stage run."]
+            wall.append(f"# TYPE {prefix}_wall_seconds histogram")
+            cpu = [f"# HELP {prefix}_cpu_seconds_total Process CPU time per stage."]
+            cpu.append(f"# TYPE {prefix}_cpu_seconds_total counter")
+            mem = [f"# HELP {prefix}_peak_memory_bytes Highest traced allocation peak per stage."]
+            mem.append(f"# TYPE {prefix}_peak_memory_bytes gauge")
+            for name, stats in stages:
+                label = f'stage="{_escape(name)}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), stats.buckets):
+                    cumulative += count
+                    wall.append(f'{prefix}_wall_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+                wall.append(f"{prefix}_wall_seconds_sum{{{label}}} {stats.wall_s!r}")
+                wall.append(f"{prefix}_wall_seconds_count{{{label}}} {stats.count}")
+                cpu.append(f"{prefix}_cpu_seconds_total{{{label}}} {stats.cpu_s!r}")
+                if stats.peak_bytes is not None:
+                    mem.append(f"{prefix}_peak_memory_bytes{{{label}}} {stats.peak_bytes}")
+        return "\n".join(wall + cpu + mem) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_registry = MetricsRegistry.from_env()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+def enable(track_memory: bool = False) -> MetricsRegistry:
+    """Start recording stages in the process-wide registry."""
+    _registry.enabled = True
+    _registry.track_memory = track_memory
+    if not track_memory:
+        _registry.stop_tracing()
+    return _registry
+
+
+def disable() -> None:
+    _registry.enabled = False
+    _registry.stop_tracing()
@@ -0,0 +1,167 @@
+"""Keyword lift table: which title terms and bigrams go with higher enrollment."""
+
+import numpy as np
+import pandas as pd
+
+from compiled_model import word_analyzer
+
+TABLE_COLUMNS = ["term", "doc_freq", "median_subscribers", "lift"]
+
+
+class KeywordLiftTable:
+    """Per-term document frequency, median subscribers and lift over the catalog median.
+
+    Built once from the training titles; answering "which strong keywords
+    does this title contain?" is then a single tokenize-and-probe against a
+    dict, O(tokens) per request.
+
+    A term's median is shrunk toward the baseline by ``prior_df`` pseudo
+    documents before the lift is taken, so a bigram seen in five titles
+    cannot outrank a word seen in five hundred on luck alone. When subjects
+    are passed to fit(), the same statistics are kept per subject (against
+    that subject's median) and suggestions are drawn from the course's own
+    subject. Only terms of up to ``suggest_ngrams`` words that appear in at
+    least ``suggest_min_df`` titles are suggested.
+    """
+
+    def __init__(
+        self,
+        min_df=5,
+        ngram_range=(1, 2),
+        min_lift=1.5,
+        n_suggestions=5,
+        prior_df=20,
+        suggest_min_df=20,
+        suggest_ngrams=1,
+    ):
+        self.min_df = min_df
+        self.ngram_range = ngram_range
+        self.min_lift = min_lift
+        self.n_suggestions = n_suggestions
+        self.prior_df = prior_df
+        self.suggest_min_df = suggest_min_df
+        self.suggest_ngrams = suggest_ngrams
+        self.table = None
+        self.subject_table = None
+        self.baseline = None
+        self._lift = {}
+        self._subject_lift = {}
+        self._suggestions = []
+        self._subject_suggestions = {}
+        self.stop_words_ = frozenset()
+        self._analyzer = None
+
+    def fit(self, titles, subscribers, subjects=None):
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        counts = CountVectorizer(
+            binary=True,
+            ngram_range=self.ngram_range,
+            stop_words="english",
+            min_df=self.min_df,
+        )
+        try:
+            presence = counts.fit_transform(titles).tocsr()
+        except ValueError:
+            # No term reaches min_df (tiny catalogs): empty table, no suggestions
+            presence = None
+        # Kept so lookups can tokenize the same way without scikit-learn
+        self.stop_words_ = counts.get_stop_words()
+        self._analyzer = None
+
+        values = np.asarray(subscribers, dtype=float)
+        self.baseline = float(np.median(values)) if len(values) else 0.0
+        terms = counts.get_feature_names_out() if presence is not None else []
+        self.table = self._term_stats(presence, terms, values)
+
+        per_subject = {}
+        if subjects is not None and presence is not None:
+            subjects = np.asarray(subjects, dtype=object)
+            for subject in pd.unique(subjects):
+                rows = np.flatnonzero(subjects == subject)
+                per_subject[subject] = self._term_stats(presence[rows], terms, values[rows])
+        self.subject_table = (
+            pd.concat(per_subject, names=["subject"]) if per_subject else None
+        )
+        self._build_lookups()
+        return self
+
+    def lift(self, term, subject=None):
+        return self._lifts(subject).get(term)
+
+    def strong_terms(self, title, subject=None):
+        """Terms/bigrams in ``title`` whose lift (within ``subject`` if known) is at least min_lift."""
+        lifts = self._lifts(subject)
+        return [t for t in self._analyze(title) if lifts.get(t, 0.0) >= self.min_lift]
+
+    def suggest(self, title, subject=None):
+        """Top high-lift keywords to add, or [] if the title already has a strong one.
+
+        Drawn from ``subject``'s own titles when the table was fit with
+        subjects and knows it; otherwise from the whole catalog.
+        """
+        if self.strong_terms(title, subject):
+            return []
+        return list(self._subject_suggestions.get(subject, self._suggestions))
+
+    def top_terms(self, n=None, subject=None):
+        """The keywords suggest() offers, best first: up to ``n`` (default n_suggestions).
+
+        Taken from ``subject``'s table when it is known, else catalog-wide.
+        """
+        table = self.table
+        if subject in self._subject_suggestions:
+            table = self.subject_table.xs(subject, level="subject")
+        return self._top_terms(table, n or self.n_suggestions)
+
+    def _lifts(self, subject):
+        return self._subject_lift.get(subject, self._lift)
+
+    def _analyze(self, title):
+        if self._analyzer is None:
+            self._analyzer = word_analyzer(self.stop_words_, self.ngram_range)
+        return self._analyzer(title)
+
+    def _term_stats(self, presence, terms, values):
+        """Lift table of ``terms`` over the rows of ``presence`` (terms below min_df dropped)."""
+        baseline = float(np.median(values)) if len(values) else 0.0
+        denom = max(baseline, 1.0)
+        rows = []
+        if presence is not None and presence.shape[0]:
+            presence = presence.tocsc()
+            doc_freq = np.diff(presence.indptr)
+            for j in np.flatnonzero(doc_freq >= self.min_df):
+                docs = presence.indices[presence.indptr[j] : presence.indptr[j + 1]]
+                median = float(np.median(values[docs]))
+                n = len(docs)
+                shrunk = (n * median + self.prior_df * baseline) / (n + self.prior_df)
+                rows.append((terms[j], n, median, shrunk / denom))
+        return (
+            pd.DataFrame(rows, columns=TABLE_COLUMNS)
+            .set_index("term")
+            .sort_values("lift", ascending=False)
+        )
+
+    def _top_terms(self, table, n):
+        words = table.index.str.count(" ") + 1
+        strong = table[
+            (table["lift"] >= self.min_lift)
+            & (table["doc_freq"] >= self.suggest_min_df)
+            & (words <= self.suggest_ngrams)
+        ]
+        return [t.title() for t in strong.index[:n]]
+
+    def _build_lookups(self):
+        self._lift = self.table["lift"].to_dict()
+        self._suggestions = self._top_terms(self.table, self.n_suggestions)
+        self._subject_lift, self._subject_suggestions = {}, {}
+        if self.subject_table is not None:
+            for subject, table in self.subject_table.groupby(level="subject", sort=False):
+                table = table.droplevel("subject")
+                self._subject_lift[subject] = table["lift"].to_dict()
+                self._subject_suggestions[subject] = self._top_terms(table, self.n_suggestions)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_analyzer"] = None  # rebuilt on first use
+        return state
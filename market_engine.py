@@ -1,61 +1,554 @@
+import os
+import threading
 import warnings
+from collections import OrderedDict
+from contextlib import nullcontext
+from pathlib import Path
 
+import joblib
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, r2_score
-from sklearn.preprocessing import LabelEncoder
+from scipy import sparse
+
+from compiled_model import CompiledForest, CompiledVectorizer, FittedClasses
+from dataset_cache import load_catalog, source_stamp, source_unchanged
+from instrumentation import get_registry
+from keyword_lift import KeywordLiftTable
+from model_backends import compare_backends, get_backend
+from near_duplicates import drop_near_duplicates
+from parallel_config import get_config
+from similar_courses import SimilarCourseIndex
+from title_optimizer import TitleOptimizer
 
 warnings.filterwarnings("ignore")
 
+DATA_FILE = "udemy_courses.csv"
+MODEL_FILE = "udemy_engine.joblib"
+COMPILED_MODEL_FILE = "udemy_engine.compiled.joblib"
+ARTIFACT_VERSION = 10
+NUMERIC_FEATURES = ["price", "subject_enc", "level_enc"]
+TRAINING_COLUMNS = ["course_title", "price", "subject", "level", "num_subscribers"]
+RESULT_COLUMNS = (
+    "prediction",
+    "prediction_int",
+    "percentile",
+    "segment_percentile",
+    "percent_of_average",
+    "advice",
+)
+
+
+class MarketStats:
+    """Subscriber distribution of the catalog, sorted once so ranks are a binary search.
+
+    Keeps a sorted array plus mean/quantiles for the whole market and for each
+    subject, level and (subject, level) segment.
+    """
+
+    QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+    def __init__(self, subscribers, subjects, levels):
+        values = np.asarray(subscribers, dtype=float)
+        subjects = np.asarray(subjects, dtype=object)
+        levels = np.asarray(levels, dtype=object)
+
+        self.overall = self._summarize(values)
+        self.by_subject = self._group(values, subjects)
+        self.by_level = self._group(values, levels)
+        self.by_segment = self._group(values, list(zip(subjects, levels)))
+
+    @property
+    def mean(self):
+        return self.overall["mean"]
+
+    def extend(self, subscribers, subjects, levels):
+        """Merge newly arrived courses; only the groups they touch are rebuilt."""
+        values = np.asarray(subscribers, dtype=float)
+        subjects = np.asarray(subjects, dtype=object)
+        levels = np.asarray(levels, dtype=object)
+
+        self.overall = self._merge(self.overall, values)
+        for table, keys in (
+            (self.by_subject, subjects),
+            (self.by_level, levels),
+            (self.by_segment, list(zip(subjects, levels))),
+        ):
+            for key, group in pd.Series(values).groupby(pd.Series(keys).to_numpy(), sort=False):
+                table[key] = self._merge(table.get(key), group.to_numpy())
+
+    @classmethod
+    def _merge(cls, stats, values):
+        if stats is None:
+            return cls._summarize(values)
+        return cls._summarize(np.concatenate([stats["sorted"], values]))
+
+    def percentile(self, value):
+        """Share of catalog courses (0-100) with at most ``value`` subscribers."""
+        return self._rank(self.overall, value)
+
+    def segment_percentile(self, value, subject, level):
+        """Percentile rank within the (subject, level) segment, or None if unseen."""
+        stats = self.by_segment.get((subject, level))
+        return None if stats is None else float(self._rank(stats, value))
+
+    def segment_percentiles(self, values, subjects, levels):
+        """Vectorized segment_percentile; NaN where the segment is unseen."""
+        values = np.asarray(values, dtype=float)
+        keys = pd.MultiIndex.from_arrays([np.asarray(subjects), np.asarray(levels)])
+        out = np.full(len(values), np.nan)
+        codes, uniques = keys.factorize()
+        for code, key in enumerate(uniques):
+            stats = self.by_segment.get(key)
+            if stats is not None:
+                mask = codes == code
+                out[mask] = self._rank(stats, values[mask])
+        return out
+
+    @classmethod
+    def _group(cls, values, keys):
+        order = pd.Series(values).groupby(pd.Series(keys).to_numpy(), sort=False)
+        return {key: cls._summarize(group.to_numpy()) for key, group in order}
+
+    @classmethod
+    def _summarize(cls, values):
+        ordered = np.sort(values)
+        return {
+            "sorted": ordered,
+            "count": int(len(ordered)),
+            "mean": float(ordered.mean()) if len(ordered) else 0.0,
+            "quantiles": dict(
+                zip(cls.QUANTILES, np.quantile(ordered, cls.QUANTILES).tolist())
+            )
+            if len(ordered)
+            else {},
+        }
+
+    @staticmethod
+    def _rank(stats, value):
+        if not stats["count"]:
+            return 0.0
+        return np.searchsorted(stats["sorted"], value, side="right") / stats["count"] * 100
+
+
+class PredictionCache:
+    """Thread-safe bounded LRU map with hit/miss/eviction counters."""
+
+    def __init__(self, maxsize=1024):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
 
 class UdemyMarketEngine:
-    def __init__(self, data_path="udemy_courses.csv"):
-        print("[Init] Loading data...")
-        self.df = pd.read_csv(data_path)
-        self.vectorizer = TfidfVectorizer(max_features=100, stop_words="english")
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+    # Everything preprocess_and_train fits; this is what save()/load() round-trip.
+    _FITTED_ATTRS = (
+        "backend_name",
+        "vectorizer",
+        "model",
+        "le_subject",
+        "le_level",
+        "metrics_",
+        "market_stats_",
+        "feature_names_",
+        "n_rows_",
+        "similar_index_",
+        "keyword_lift_",
+    )
+
+    def __init__(
+        self,
+        data_path=DATA_FILE,
+        read_data=True,
+        max_features=100,
+        cache_size=0,
+        parallel=None,
+        backend=None,
+        near_duplicates=None,
+    ):
+        # scikit-learn is only needed to train; loading skips these imports
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.preprocessing import LabelEncoder
+
+        self._setup(data_path, cache_size, parallel, backend)
+        # Near-duplicate policy applied before training (see near_duplicates.py)
+        self.near_duplicates = near_duplicates
+        if read_data:
+            print("[Init] Loading data...")
+            self.df = load_catalog(data_path)
+        self.vectorizer = TfidfVectorizer(max_features=max_features, stop_words="english")
+        self.model = self.backend.build(self.parallel, random_state=42, n_estimators=100)
         self.le_subject = LabelEncoder()
         self.le_level = LabelEncoder()
 
+    def _setup(self, data_path, cache_size, parallel, backend):
+        """Runtime state shared by fresh and loaded engines (no estimators)."""
+        self.data_path = data_path
+        self.parallel = parallel or get_config()
+        self.backend = get_backend(backend)
+        self.backend_name = self.backend.name
+        # Opt-in memoization of predict_course; cleared whenever the model changes
+        self.prediction_cache = PredictionCache(cache_size) if cache_size else None
+        # Stage timings (no-op unless enabled, see instrumentation.py)
+        self.stage_metrics = get_registry()
+        # True when loaded from a compiled (prediction-only) artifact
+        self.compiled_ = False
+        self.data_hash_ = None
+        self.data_stamp_ = None
+        self.df = None
+
     def preprocess_and_train(self):
+        from sklearn.metrics import mean_absolute_error, r2_score
+        from sklearn.model_selection import train_test_split
+
         print("[Train] Fitting Oracle model (title NLP + regression)...")
+        stage = self.stage_metrics.stage
+        self.data_stamp_ = source_stamp(self.data_path)
+        self.data_hash_ = self.data_stamp_["sha256"]
 
         # 1. Clean Data
-        self.df = self.df.dropna()
-        self.df = self.df.drop_duplicates()
+        with stage("train.clean"):
+            self.df = self.df.dropna()
+            self.df = self.df.drop_duplicates()
+            self.df = drop_near_duplicates(self.df, self.near_duplicates)
 
-        # 2. Text Engineering
-        title_vectors = self.vectorizer.fit_transform(self.df["course_title"]).toarray()
-        title_df = pd.DataFrame(title_vectors, columns=[f"txt_{i}" for i in range(100)])
+        # 2. Text Engineering (kept sparse; vocabulary size is max_features)
+        with stage("train.vectorize"):
+            title_vectors = self.vectorizer.fit_transform(self.df["course_title"])
 
         # 3. Categorical Encoding
-        self.df["subject_enc"] = self.le_subject.fit_transform(self.df["subject"])
-        self.df["level_enc"] = self.le_level.fit_transform(self.df["level"])
-
-        # 4. Feature Assembly
-        X_numerical = self.df[["price", "subject_enc", "level_enc"]].reset_index(drop=True)
-        X = pd.concat([X_numerical, title_df], axis=1)
-        y = self.df["num_subscribers"]
+        with stage("train.encode"):
+            self.df["subject_enc"] = self.le_subject.fit_transform(self.df["subject"])
+            self.df["level_enc"] = self.le_level.fit_transform(self.df["level"])
+
+        # 4. Feature Assembly: numeric columns first, then one column per term
+        with stage("train.assemble"):
+            X = self._stack_features(
+                self.df[NUMERIC_FEATURES].to_numpy(dtype=float), title_vectors
+            )
+            y = self.df["num_subscribers"]
+            self.feature_names_ = NUMERIC_FEATURES + [
+                f"txt_{term}" for term in self.vectorizer.get_feature_names_out()
+            ]
 
         # 5. Train
-        self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(
-            X, y, test_size=0.2
-        )
-        self.model.fit(self.X_train, self.y_train)
+        with stage("train.split"):
+            self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(
+                X, y, test_size=0.2
+            )
+        with stage("train.fit"):
+            self._fit(self.X_train, self.y_train)
+
+        with stage("train.index"):
+            self.market_stats_ = MarketStats(y, self.df["subject"], self.df["level"])
+            self.n_rows_ = len(y)
+            self.similar_index_ = SimilarCourseIndex(title_vectors, self.df)
+            self.keyword_lift_ = KeywordLiftTable().fit(
+                self.df["course_title"], y, self.df["subject"]
+            )
 
-        preds = self.model.predict(self.X_test)
-        self.metrics_ = {
-            "mae": float(mean_absolute_error(self.y_test, preds)),
-            "r2": float(r2_score(self.y_test, preds)),
-        }
+        with stage("train.evaluate"):
+            preds = self._predict(self.X_test)
+            self.metrics_ = {
+                "mae": float(mean_absolute_error(self.y_test, preds)),
+                "r2": float(r2_score(self.y_test, preds)),
+            }
         print(
             f"[Eval] MAE: {self.metrics_['mae']:.2f} | R^2: {self.metrics_['r2']:.3f}"
         )
+        self._model_changed()
         print("[Train] Done. Ready for predictions.\n")
 
+    def save(self, path=MODEL_FILE, compiled=False):
+        """Write all fitted components, metrics and the source data hash to one artifact.
+
+        ``compiled=True`` writes a prediction-only artifact: the model,
+        vectorizer and encoders are replaced by the NumPy equivalents in
+        compiled_model, so loading it does not import scikit-learn. Engines
+        loaded from one can predict but not update, compact or retrain.
+        """
+        state = {attr: getattr(self, attr) for attr in self._FITTED_ATTRS}
+        if compiled and not self.compiled_:
+            state["model"] = CompiledForest.from_estimator(self.model)
+            state["vectorizer"] = CompiledVectorizer.from_tfidf(self.vectorizer)
+            state["le_subject"] = FittedClasses(self.le_subject.classes_)
+            state["le_level"] = FittedClasses(self.le_level.classes_)
+        state["compiled"] = compiled or self.compiled_
+        state["version"] = ARTIFACT_VERSION
+        state["data_path"] = str(self.data_path)
+        state["data_hash"] = self.data_hash_
+        state["data_stamp"] = self.data_stamp_
+        # Write under a temporary name and swap in, so a crash mid-save or a
+        # concurrent writer never leaves a truncated artifact behind
+        path = Path(path)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        joblib.dump(state, tmp)
+        os.replace(tmp, path)
+        print(f"[Save] Model artifact -> {path}")
+
+    @classmethod
+    def load(
+        cls,
+        path=MODEL_FILE,
+        expected_hash=None,
+        cache_size=0,
+        parallel=None,
+        expected_backend=None,
+        source=None,
+    ):
+        """Restore a trained engine from save(); raises ValueError if the artifact is stale.
+
+        With ``source``, the artifact must have been trained on that CSV as it
+        is now: its size and mtime are checked first and the file is hashed
+        only if they moved (a touched but unchanged CSV re-saves the artifact
+        with the new mtime). A missing ``source`` is not an error; the
+        artifact is used as is.
+        """
+        state = joblib.load(path)
+        if state.get("version") != ARTIFACT_VERSION:
+            raise ValueError(
+                f"Artifact version {state.get('version')} != expected {ARTIFACT_VERSION}"
+            )
+        if expected_hash is not None and state["data_hash"] != expected_hash:
+            raise ValueError("Artifact was trained on different data")
+        stamp = state["data_stamp"] or {}
+        mtime_ns = stamp.get("mtime_ns")
+        if source is not None and not Path(source).exists():
+            print(f"[Load] {source} not found; using the saved model without checking it.")
+        elif source is not None and not source_unchanged(source, stamp):
+            raise ValueError("Artifact was trained on different data")
+        if expected_backend is not None and state["backend_name"] != expected_backend:
+            raise ValueError(f"Artifact uses the {state['backend_name']} backend")
+
+        engine = cls.__new__(cls)
+        engine._setup(state["data_path"], cache_size, parallel, state["backend_name"])
+        for attr in cls._FITTED_ATTRS:
+            setattr(engine, attr, state[attr])
+        engine.compiled_ = state["compiled"]
+        engine.data_hash_ = state["data_hash"]
+        engine.data_stamp_ = state["data_stamp"]
+        engine._model_changed()
+        print(f"[Load] Model artifact <- {path}")
+        if stamp.get("mtime_ns") != mtime_ns:
+            engine.save(path)  # keep later startups on the size/mtime fast path
+        return engine
+
+    @classmethod
+    def load_or_train(
+        cls,
+        data_path=DATA_FILE,
+        model_path=MODEL_FILE,
+        cache_size=0,
+        parallel=None,
+        backend=None,
+        compiled=False,
+        near_duplicates=None,
+    ):
+        """Reuse the saved artifact when the CSV is unchanged (or missing); otherwise retrain.
+
+        An explicit ``backend`` also forces a retrain if the artifact used another one.
+        With ``compiled=True`` a retrain saves a compiled (prediction-only) artifact.
+        ``near_duplicates`` is the dedup policy for a retrain.
+        """
+        if Path(model_path).exists():
+            try:
+                return cls.load(
+                    model_path,
+                    source=data_path,
+                    cache_size=cache_size,
+                    parallel=parallel,
+                    expected_backend=backend,
+                )
+            except Exception as e:
+                # Stale, truncated or unpicklable (e.g. other sklearn version): retrain
+                print(f"[Load] Ignoring saved model ({type(e).__name__}: {e}); retraining.")
+
+        engine = cls(
+            data_path=data_path,
+            cache_size=cache_size,
+            parallel=parallel,
+            backend=backend,
+            near_duplicates=near_duplicates,
+        )
+        engine.preprocess_and_train()
+        engine.save(model_path, compiled=compiled)
+        return engine
+
+    def update(self, new_rows, n_new_trees=None, appended_to_source=False):
+        """Fold newly arrived courses into the model without a full retrain.
+
+        The TF-IDF vocabulary stays fixed so existing trees keep their feature
+        layout; unseen subjects/levels are appended to the encoders. The forest
+        is warm-started with extra trees fit only on ``new_rows`` (by default in
+        proportion to their share of all rows seen), and market stats are merged.
+        Pass ``appended_to_source=True`` once the rows are in ``data_path`` so
+        the saved artifact still matches the CSV for load_or_train().
+
+        Returns a report with the rows used, trees added and MAE/R^2 on a
+        holdout of the new rows (None when there are too few to evaluate).
+        """
+        from sklearn.metrics import mean_absolute_error, r2_score
+        from sklearn.model_selection import train_test_split
+
+        if self.compiled_:
+            raise RuntimeError("update() needs a full artifact; this engine is compiled")
+        new = new_rows.dropna(subset=TRAINING_COLUMNS).drop_duplicates()
+        if new.empty:
+            raise ValueError("No complete rows to update the model with")
+        print(f"[Update] Adding {len(new)} courses to the Oracle model...")
+
+        added_subjects = self._extend_encoder(self.le_subject, new["subject"])
+        added_levels = self._extend_encoder(self.le_level, new["level"])
+        if added_subjects or added_levels:
+            print(f"[Update] New categories: {added_subjects + added_levels}")
+
+        X = self._prepare_batch(
+            titles=new["course_title"].astype(str).tolist(),
+            prices=new["price"].to_numpy(dtype=float),
+            subjects=new["subject"].to_numpy(),
+            levels=new["level"].to_numpy(),
+        )
+        y = new["num_subscribers"].to_numpy(dtype=float)
+
+        # Hold out a slice of the delta for evaluation when there is enough of it
+        if len(new) >= 10:
+            X_fit, X_eval, y_fit, y_eval = train_test_split(X, y, test_size=0.2)
+        else:
+            X_fit, y_fit, X_eval, y_eval = X, y, None, None
+
+        n_existing = self.backend.n_units(self.model)
+        if n_new_trees is None:
+            n_new_trees = max(1, round(n_existing * len(new) / (self.n_rows_ + len(new))))
+        self.backend.grow(self.model, n_new_trees)
+        self._fit(X_fit, y_fit)
+        self.model.set_params(warm_start=False)
+
+        self.market_stats_.extend(y, new["subject"], new["level"])
+        self.similar_index_.extend(X[:, self._text_offset :], new)
+        self.n_rows_ += len(new)
+        if self.df is not None:
+            new = new.assign(
+                subject_enc=X[:, 1].toarray().ravel().astype(int),
+                level_enc=X[:, 2].toarray().ravel().astype(int),
+            )
+            self.df = pd.concat([self.df, new])
+        if appended_to_source:
+            self.data_stamp_ = source_stamp(self.data_path)
+            self.data_hash_ = self.data_stamp_["sha256"]
+
+        report = {
+            "rows": len(new),
+            "new_trees": n_new_trees,
+            "n_estimators": self.backend.n_units(self.model),
+            "mae": None,
+            "r2": None,
+        }
+        if X_eval is not None:
+            preds = self._predict(X_eval)
+            report["mae"] = float(mean_absolute_error(y_eval, preds))
+            report["r2"] = float(r2_score(y_eval, preds))
+            print(f"[Eval] New-rows MAE: {report['mae']:.2f} | R^2: {report['r2']:.3f}")
+        self.metrics_ = {**self.metrics_, "last_update": report}
+
+        self._model_changed()
+        print(f"[Update] Done. Model now has {report['n_estimators']} trees/iterations.\n")
+        return report
+
+    def compact(self, max_bytes=None, max_latency_ms=None, apply=True, **options):
+        """Swap the forest for a smaller variant within a memory and/or latency budget.
+
+        Needs the train/test split from preprocess_and_train in this process.
+        Candidates (top-k tree selection, depth-capped refits, distilled
+        students; see model_compaction.compact_forest, which takes ``options``)
+        are compared on size, single-row latency and holdout MAE/R^2. The most
+        accurate one inside the budget replaces the model when ``apply`` is True.
+        Returns the chosen name and the comparison report.
+        """
+        if self.backend_name != "random_forest":
+            raise ValueError("compact() only supports the random_forest backend")
+        if getattr(self, "X_train", None) is None:
+            raise RuntimeError(
+                "compact() needs the training split; run preprocess_and_train first"
+            )
+
+        from model_compaction import compact_forest
+
+        with self.parallel.training():
+            result = compact_forest(
+                self.model,
+                self.X_train,
+                self.y_train,
+                self.X_test,
+                self.y_test,
+                max_bytes=max_bytes,
+                max_latency_ms=max_latency_ms,
+                n_jobs=self.parallel.n_jobs,
+                predict_n_jobs=self.parallel.predict_n_jobs,
+                **options,
+            )
+        print(f"[Compact] Chose '{result['name']}':")
+        print(result["report"].round(3).to_string())
+
+        if apply:
+            self.model = result["model"]
+            chosen = result["report"].loc[result["name"]]
+            self.metrics_ = {
+                **self.metrics_,
+                "compaction": {
+                    "name": result["name"],
+                    "mae": float(chosen["mae"]),
+                    "r2": float(chosen["r2"]),
+                },
+            }
+        self._model_changed()
+        return {"name": result["name"], "report": result["report"]}
+
+    @staticmethod
+    def _extend_encoder(encoder, values):
+        # Append (not re-sort) so codes the existing trees were trained on stay put
+        known = set(encoder.classes_)
+        added = [v for v in pd.unique(np.asarray(values, dtype=object)) if v not in known]
+        if added:
+            encoder.classes_ = np.concatenate([encoder.classes_, np.asarray(added, dtype=object)])
+        return added
+
     def analyze_user_idea(self, title, price, subject, level):
         print(f"[Analyze] Course: '{title}'...")
         result = self.predict_course(title=title, price=price, subject=subject, level=level)
@@ -64,55 +557,295 @@ class UdemyMarketEngine:
         print(f"Results for: {title}")
         print("=" * 40)
         print(f"Predicted Subscribers: {result['prediction_int']:,}")
-        print(f"Market Performance:    {result['percentile']:.1f}% of the average course")
+        print(f"Market Performance:    {result['percent_of_average']:.1f}% of the average course")
+        print(f"Market Percentile:     {result['percentile']:.1f}")
+        if result["segment_percentile"] is not None:
+            print(f"Segment Percentile:    {result['segment_percentile']:.1f} ({subject}, {level})")
 
         self._print_advice(result["advice"])
 
     def predict_course(self, title, price, subject, level):
         """Programmatic prediction interface (no prints)."""
-        final_input = self._prepare_input(title=title, price=price, subject=subject, level=level)
-
-        prediction = float(self.model.predict(final_input)[0])
-        avg_subs = self.df["num_subscribers"].mean()
-        percentile = (prediction / avg_subs) * 100 if avg_subs else 0.0
-        advice = self._advice_messages(prediction, price, title)
+        cache = self.prediction_cache
+        if cache is None:
+            return self._predict_course(title, price, subject, level)
+
+        key = self._cache_key(title, price, subject, level)
+        result = cache.get(key)
+        if result is None:
+            result = self._predict_course(title, price, subject, level)
+            cache.put(key, result)
+        # Hand out copies so callers cannot mutate the cached advice list
+        return dict(result, advice=list(result["advice"]))
+
+    def enable_cache(self, maxsize=1024):
+        """Turn on (or resize) predict_course memoization; starts empty."""
+        self.prediction_cache = PredictionCache(maxsize)
+
+    def cache_stats(self):
+        """Hit/miss/eviction/size counters, or None when caching is off."""
+        return None if self.prediction_cache is None else self.prediction_cache.stats()
+
+    @staticmethod
+    def _cache_key(title, price, subject, level):
+        # The vectorizer lowercases and tokenizes on words, so case and
+        # whitespace do not change the prediction or the advice.
+        return (" ".join(str(title).lower().split()), float(price), subject, level)
+
+    def _predict_course(self, title, price, subject, level):
+        stage = self.stage_metrics.stage
+        with stage("predict.prepare"):
+            final_input = self._prepare_row(
+                title=title, price=price, subject=subject, level=level
+            )
+        with stage("predict.inference"):
+            with self._threads(for_inference=True):
+                prediction = float(self.model.predict(final_input)[0])  # dense row: any backend
+        stats = self.market_stats_
+        with stage("predict.advice"):
+            advice = self._advice_messages(prediction, price, title, subject)
 
         return {
             "prediction": prediction,
             "prediction_int": int(prediction),
-            "percentile": percentile,
+            "percentile": float(stats.percentile(prediction)),
+            "segment_percentile": stats.segment_percentile(prediction, subject, level),
+            "percent_of_average": (prediction / stats.mean) * 100 if stats.mean else 0.0,
             "advice": advice,
         }
 
-    def _prepare_input(self, title, price, subject, level):
-        # Vectorize title
-        title_vec = self.vectorizer.transform([title]).toarray()
-        title_df = pd.DataFrame(title_vec, columns=[f"txt_{i}" for i in range(100)])
+    def predict_courses(self, courses):
+        """Batch prediction for a DataFrame with title, price, subject and level columns.
+
+        Titles are vectorized in one transform and the forest is called once.
+        Returns a copy of ``courses`` with the predict_course result keys
+        appended as columns.
+        """
+        missing = [c for c in ("title", "price", "subject", "level") if c not in courses]
+        if missing:
+            raise ValueError(f"Missing columns for batch prediction: {missing}")
+
+        out = courses.copy()
+        if out.empty:
+            for col in RESULT_COLUMNS:
+                out[col] = pd.Series(dtype=object)
+            return out
+
+        stage = self.stage_metrics.stage
+        with stage("batch.prepare"):
+            features = self._prepare_batch(
+                titles=out["title"].astype(str).tolist(),
+                prices=out["price"].to_numpy(dtype=float),
+                subjects=out["subject"].to_numpy(),
+                levels=out["level"].to_numpy(),
+            )
+        with stage("batch.inference"):
+            predictions = self._predict(features)
+        stats = self.market_stats_
+
+        out["prediction"] = predictions
+        out["prediction_int"] = predictions.astype(int)
+        out["percentile"] = stats.percentile(predictions)
+        out["segment_percentile"] = stats.segment_percentiles(
+            predictions, out["subject"].to_numpy(), out["level"].to_numpy()
+        )
+        out["percent_of_average"] = predictions / stats.mean * 100 if stats.mean else 0.0
+        with stage("batch.advice"):
+            out["advice"] = [
+                self._advice_messages(pred, price, title, subject)
+                for pred, price, title, subject in zip(
+                    predictions, out["price"], out["title"].astype(str), out["subject"]
+                )
+            ]
+        return out
+
+    def similar_courses(self, title, k=5, subject=None, level=None):
+        """Top-k existing courses whose titles are closest (TF-IDF cosine) to ``title``.
+
+        Optionally restricted to a subject and/or level. Each result has
+        course_title, price, num_subscribers, subject, level and similarity.
+        """
+        cols, weights = self._title_terms(title)
+        return self.similar_index_.query(cols, weights, k=k, subject=subject, level=level)
+
+    def price_response_surface(self, title, prices=None, subjects=None, levels=None):
+        """Predict one title across a price x subject x level grid in a single model call.
+
+        Defaults to prices 0-200 in steps of 5 and every known subject and
+        level. Returns ``{"surface": DataFrame, "best": dict}`` where the frame
+        has price, subject, level, prediction and revenue (price x predicted
+        subscribers, gross) columns and ``best`` is the revenue-maximizing row.
+        """
+        prices = np.linspace(0, 200, 41) if prices is None else np.asarray(prices, dtype=float)
+        subjects = list(self.le_subject.classes_) if subjects is None else list(subjects)
+        levels = list(self.le_level.classes_) if levels is None else list(levels)
+
+        grid = pd.MultiIndex.from_product(
+            [subjects, levels, prices], names=["subject", "level", "price"]
+        ).to_frame(index=False)
+        subj_enc = self._encode_categories(self.le_subject, grid["subject"], "subject")
+        lvl_enc = self._encode_categories(self.le_level, grid["level"], "level")
+        numeric = np.column_stack([grid["price"].to_numpy(), subj_enc, lvl_enc])
+
+        # The title is vectorized once and its CSR row repeated for every grid cell
+        title_vec = self.vectorizer.transform([title])
+        title_block = title_vec[np.zeros(len(grid), dtype=np.intp)]
+
+        grid["prediction"] = self._predict(self._stack_features(numeric, title_block))
+        grid["revenue"] = grid["price"] * grid["prediction"]
+        best = grid.loc[grid["revenue"].idxmax()].to_dict()
+        return {"surface": grid, "best": best}
+
+    def optimize_title(
+        self, title, price, subject, level, top_k=5, beam_width=8, depth=2, n_keywords=25
+    ):
+        """Beam-search title rewrites with high-lift keywords; see TitleOptimizer."""
+        optimizer = TitleOptimizer(
+            self, n_keywords=n_keywords, beam_width=beam_width, depth=depth
+        )
+        return optimizer.optimize(title, price, subject, level, top_k=top_k)
+
+    def title_keywords(self, n=25):
+        """Model vocabulary terms ranked by catalog lift, then by forest importance."""
+        if self._keyword_ranking is None:
+            terms = self.vectorizer.get_feature_names_out()
+            importances = getattr(self.model, "feature_importances_", None)
+            if importances is None:
+                importances = np.zeros(self._text_offset + len(terms))
+            importances = importances[self._text_offset :]
+            lift = np.array([self.keyword_lift_.lift(t) or 0.0 for t in terms])
+            self._keyword_ranking = [terms[i] for i in np.lexsort((-importances, -lift))]
+        return self._keyword_ranking[:n]
+
+    def compare_backends(self, names=None, **params):
+        """Fit every model backend on this engine's split; see model_backends.compare_backends."""
+        if getattr(self, "X_train", None) is None:
+            raise RuntimeError(
+                "compare_backends() needs the training split; run preprocess_and_train first"
+            )
+        return compare_backends(
+            self.X_train,
+            self.y_train,
+            self.X_test,
+            self.y_test,
+            names=names,
+            parallel=self.parallel,
+            **params,
+        )
 
-        # Encode inputs with fallbacks
-        try:
-            subj_enc = int(self.le_subject.transform([subject])[0])
-        except ValueError:
+    def _fit(self, X, y):
+        self.parallel.configure_estimator(self.model)
+        with self.parallel.training(), self._threads():
+            self.model.fit(self.backend.prepare(X), y)
+
+    def _predict(self, X):
+        with self._threads(for_inference=True):
+            return self.model.predict(self.backend.prepare(X))
+
+    def _threads(self, for_inference=False):
+        # Compiled models are NumPy-only; nothing to cap
+        if self.compiled_:
+            return nullcontext()
+        return self.backend.threads(self.parallel, for_inference)
+
+    def _model_changed(self):
+        """Hook run after any fit or load: rebuild serving lookups and drop stale predictions."""
+        # Inference runs per request; keep it from fanning out across every core
+        self.parallel.configure_estimator(self.model, for_inference=True)
+        self._build_serving_tables()
+        if self.prediction_cache is not None:
+            self.prediction_cache.clear()
+
+    def _build_serving_tables(self):
+        """Precompute lookups used by the single-row path so requests skip pandas/sklearn."""
+        self._subject_index = {c: i for i, c in enumerate(self.le_subject.classes_)}
+        self._level_index = {c: i for i, c in enumerate(self.le_level.classes_)}
+        self._analyzer = self.vectorizer.build_analyzer()
+        self._vocab = self.vectorizer.vocabulary_
+        self._idf = self.vectorizer.idf_
+        # Title term j lives in column len(NUMERIC_FEATURES) + j of the feature row
+        self._text_offset = len(NUMERIC_FEATURES)
+        self._n_features = self._text_offset + len(self._idf)
+        self._row_state = threading.local()
+        self._keyword_ranking = None
+
+    def _row_buffer(self):
+        # One buffer per thread; only the previously written cells are cleared
+        state = self._row_state
+        if getattr(state, "buffer", None) is None:
+            state.buffer = np.zeros((1, self._n_features), dtype=np.float32)
+            state.dirty = []
+        else:
+            state.buffer[0, state.dirty] = 0.0
+        return state
+
+    def _prepare_row(self, title, price, subject, level):
+        """Fill the reusable (1, n_features) buffer for one course; mirrors _prepare_batch."""
+        state = self._row_buffer()
+        row = state.buffer[0]
+
+        subj_enc = self._subject_index.get(subject)
+        if subj_enc is None:
             print("[Warn] Unknown subject; defaulting to first known subject.")
             subj_enc = 0
-
-        try:
-            lvl_enc = int(self.le_level.transform([level])[0])
-        except ValueError:
+        lvl_enc = self._level_index.get(level)
+        if lvl_enc is None:
             print("[Warn] Unknown level; defaulting to first known level.")
             lvl_enc = 0
-
-        input_data = pd.DataFrame(
-            {
-                "price": [price],
-                "subject_enc": [subj_enc],
-                "level_enc": [lvl_enc],
-            }
+        row[0] = price
+        row[1] = subj_enc
+        row[2] = lvl_enc
+
+        dirty = [0, 1, 2]
+        cols, weights = self._title_terms(title)
+        if len(cols):
+            cols = cols + self._text_offset
+            row[cols] = weights
+            dirty.extend(cols.tolist())
+        state.dirty = dirty
+        return state.buffer
+
+    def _title_terms(self, title):
+        """TF-IDF by hand: vocabulary ids and L2-normalised count * idf weights."""
+        counts = {}
+        for token in self._analyzer(title):
+            j = self._vocab.get(token)
+            if j is not None:
+                counts[j] = counts.get(j, 0) + 1
+        cols = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        if len(cols):
+            weights *= self._idf[cols]
+            weights /= np.sqrt(np.dot(weights, weights))
+        return cols, weights
+
+    def _prepare_batch(self, titles, prices, subjects, levels):
+        # Vectorize all titles in one pass (CSR, never densified)
+        title_vec = self.vectorizer.transform(titles)
+
+        # Encode inputs in bulk with fallbacks
+        subj_enc = self._encode_categories(self.le_subject, subjects, "subject")
+        lvl_enc = self._encode_categories(self.le_level, levels, "level")
+
+        numeric = np.column_stack([np.asarray(prices, dtype=float), subj_enc, lvl_enc])
+        return self._stack_features(numeric, title_vec)
+
+    @staticmethod
+    def _stack_features(numeric, title_vectors):
+        """Join dense numeric columns and the sparse TF-IDF matrix into one CSR matrix."""
+        return sparse.hstack(
+            [sparse.csr_matrix(numeric), title_vectors], format="csr", dtype=np.float64
         )
 
-        return pd.concat([input_data, title_df], axis=1)
+    def _encode_categories(self, encoder, values, label):
+        codes = pd.Index(encoder.classes_).get_indexer(np.asarray(values, dtype=object))
+        unknown = codes < 0
+        if unknown.any():
+            print(f"[Warn] Unknown {label}; defaulting to first known {label}.")
+            codes[unknown] = 0
+        return codes
 
-    def _advice_messages(self, prediction, price, title):
+    def _advice_messages(self, prediction, price, title, subject=None):
         advice = []
 
         if price > 50 and prediction < 1000:
@@ -122,8 +855,8 @@ class UdemyMarketEngine:
         elif price == 0:
             advice.append("Growth mode: Free pulls more traffic; ensure an upsell plan.")
 
-        power_words = ["Bootcamp", "Complete", "Master", "Guide", "Beginner"]
-        if not any(word.lower() in title.lower() for word in power_words):
+        power_words = self.keyword_lift_.suggest(title, subject)
+        if power_words:
             advice.append(f"Title optimization: add one of {power_words}.")
 
         if prediction > 5000:
@@ -140,8 +873,7 @@ class UdemyMarketEngine:
 
 
 if __name__ == "__main__":
-    engine = UdemyMarketEngine()
-    engine.preprocess_and_train()
+    engine = UdemyMarketEngine.load_or_train()
 
     print("Udemy Course Strategy Tool")
     print("Subjects: Business Finance, Graphic Design, Musical Instruments, Web Development")
@@ -0,0 +1,193 @@
+"""Regressor backends for market_engine and udemy_analysis, selectable by name.
+
+Each backend knows how to build its estimator from the shared parallelism
+config, whether it can take the sparse TF-IDF matrix directly, and how to
+warm-start more trees/iterations for incremental updates. The default comes
+from ``UDEMY_MODEL_BACKEND`` (``random_forest`` if unset). scikit-learn is
+only imported once an estimator is built, so serving from a compiled
+artifact never loads it.
+"""
+
+import os
+import time
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+from parallel_config import get_config
+
+_thread_controller = None
+
+
+class ModelBackend:
+    name = None
+    accepts_sparse = True
+
+    def build(
+        self,
+        parallel=None,
+        random_state=42,
+        n_estimators=100,
+        max_depth=None,
+        min_samples_leaf=1,
+    ):
+        raise NotImplementedError
+
+    def prepare(self, X):
+        """Convert a feature matrix into what the estimator accepts."""
+        if not self.accepts_sparse and hasattr(X, "toarray"):
+            return X.toarray().astype(np.float32, copy=False)
+        return X
+
+    def threads(self, parallel=None, for_inference=False):
+        """Context that caps the estimator's own thread pool for a fit or predict.
+
+        Estimators that take ``n_jobs`` are capped by
+        ParallelConfig.configure_estimator instead, so this does nothing.
+        """
+        return nullcontext()
+
+    def n_units(self, model):
+        """Trees or boosting iterations currently in the fitted model."""
+        raise NotImplementedError
+
+    def grow(self, model, n_new):
+        """Configure ``model`` so its next fit adds ``n_new`` units (warm start)."""
+        raise NotImplementedError
+
+
+class RandomForestBackend(ModelBackend):
+    name = "random_forest"
+
+    def build(
+        self,
+        parallel=None,
+        random_state=42,
+        n_estimators=100,
+        max_depth=None,
+        min_samples_leaf=1,
+    ):
+        from sklearn.ensemble import RandomForestRegressor
+
+        parallel = parallel or get_config()
+        return RandomForestRegressor(
+            n_estimators=n_estimators,
+            max_depth=max_depth,
+            min_samples_leaf=min_samples_leaf,
+            random_state=random_state,
+            n_jobs=parallel.n_jobs,
+        )
+
+    def n_units(self, model):
+        return len(model.estimators_)
+
+    def grow(self, model, n_new):
+        model.set_params(warm_start=True, n_estimators=self.n_units(model) + n_new)
+
+
+class HistGradientBoostingBackend(ModelBackend):
+    # Bins features into histograms; needs dense input, threads via OpenMP
+    name = "hist_gradient_boosting"
+    accepts_sparse = False
+
+    def build(
+        self,
+        parallel=None,
+        random_state=42,
+        n_estimators=100,
+        max_depth=None,
+        min_samples_leaf=1,
+    ):
+        from sklearn.ensemble import HistGradientBoostingRegressor
+
+        return HistGradientBoostingRegressor(
+            max_iter=n_estimators,
+            max_depth=max_depth,
+            min_samples_leaf=max(min_samples_leaf, 20),
+            random_state=random_state,
+        )
+
+    def threads(self, parallel=None, for_inference=False):
+        # No n_jobs: cap the OpenMP pool at the training or inference worker count
+        parallel = parallel or get_config()
+        workers = parallel.predict_workers if for_inference else parallel.train_workers
+        return _openmp_limit(workers)
+
+    def n_units(self, model):
+        return model.n_iter_
+
+    def grow(self, model, n_new):
+        model.set_params(warm_start=True, max_iter=self.n_units(model) + n_new)
+
+
+def _openmp_limit(n_threads):
+    """threadpoolctl limit on OpenMP pools; the controller is built once per process."""
+    global _thread_controller
+    if _thread_controller is None:
+        from threadpoolctl import ThreadpoolController
+
+        _thread_controller = ThreadpoolController()
+    return _thread_controller.limit(limits=n_threads, user_api="openmp")
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (RandomForestBackend(), HistGradientBoostingBackend())
+}
+
+
+def default_backend_name():
+    return os.environ.get("UDEMY_MODEL_BACKEND") or RandomForestBackend.name
+
+
+def get_backend(name=None):
+    name = name or default_backend_name()
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown model backend {name!r}; expected one of {list(BACKENDS)}")
+
+
+def compare_backends(X_train, y_train, X_test, y_test, names=None, parallel=None, **params):
+    """Fit each backend on the same split and report speed, size and accuracy.
+
+    Columns: fit_s, latency_ms (single-row predict), batch_ms (whole test
+    set), size_mb, mae and r2; one row per backend name.
+    """
+    from sklearn.metrics import mean_absolute_error, r2_score
+
+    from model_compaction import model_size_bytes, predict_latency_ms
+
+    parallel = parallel or get_config()
+    rows = []
+    for name in names or BACKENDS:
+        backend = get_backend(name)
+        model = backend.build(parallel, **params)
+
+        start = time.perf_counter()
+        with parallel.training(), backend.threads(parallel):
+            model.fit(backend.prepare(X_train), y_train)
+        fit_s = time.perf_counter() - start
+
+        parallel.configure_estimator(model, for_inference=True)
+        X_eval = backend.prepare(X_test)
+        with backend.threads(parallel, for_inference=True):
+            start = time.perf_counter()
+            preds = model.predict(X_eval)
+            batch_ms = (time.perf_counter() - start) * 1e3
+            latency_ms = predict_latency_ms(model, X_test)
+
+        rows.append(
+            {
+                "backend": name,
+                "fit_s": fit_s,
+                "latency_ms": latency_ms,
+                "batch_ms": batch_ms,
+                "size_mb": model_size_bytes(model) / 2**20,
+                "mae": float(mean_absolute_error(y_test, preds)),
+                "r2": float(r2_score(y_test, preds)),
+            }
+        )
+        print(f"[Compare] {name}: fit {fit_s:.2f}s | MAE {rows[-1]['mae']:.2f}")
+    return pd.DataFrame(rows).set_index("backend")
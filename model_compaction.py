@@ -0,0 +1,153 @@
+"""Shrink a fitted RandomForestRegressor to fit a memory or latency budget.
+
+Three families of candidates are built and measured side by side:
+
+* ``select-k``  keep the k trees that contribute most (greedy forward
+  selection on a held-out selection set), no refitting;
+* ``depth-d``   refit the same forest with ``max_depth=d``;
+* ``distil-k-d`` a small, shallow forest fit to the teacher's predictions.
+
+Every candidate stays a RandomForestRegressor so the rest of the engine
+(warm-start updates, importances, persistence) keeps working unchanged.
+"""
+
+import copy
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import mean_absolute_error, r2_score
+
+
+def model_size_bytes(model):
+    """Serialized size of the model, a close proxy for its resident memory."""
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def predict_latency_ms(model, X, repeats=50):
+    """Median wall time of a single-row predict, as the serving path calls it."""
+    row = X[:1]
+    row = np.asarray(row.toarray() if hasattr(row, "toarray") else row, dtype=np.float32)
+    model.predict(row)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1e3)
+
+
+def select_trees(forest, X_select, y_select, k):
+    """Copy of ``forest`` keeping the k trees whose greedy addition lowers MSE most."""
+    per_tree = np.vstack([tree.predict(X_select) for tree in forest.estimators_])
+    y = np.asarray(y_select, dtype=float)
+    chosen, running = [], np.zeros(len(y))
+    remaining = list(range(len(per_tree)))
+    for step in range(1, min(k, len(per_tree)) + 1):
+        # Mean of the chosen trees plus each remaining candidate
+        trial = (running[None, :] + per_tree[remaining]) / step
+        errors = ((trial - y[None, :]) ** 2).mean(axis=1)
+        best = remaining.pop(int(np.argmin(errors)))
+        chosen.append(best)
+        running += per_tree[best]
+
+    pruned = copy.copy(forest)
+    pruned.estimators_ = [forest.estimators_[i] for i in chosen]
+    pruned.n_estimators = len(chosen)
+    return pruned
+
+
+def _candidates(
+    forest, X_fit, y_fit, X_select, y_select, tree_counts, depths, students, n_jobs
+):
+    n_trees = len(forest.estimators_)
+    for k in tree_counts:
+        if k < n_trees:
+            yield f"select-{k}", lambda k=k: select_trees(forest, X_select, y_select, k)
+    for depth in depths:
+        yield f"depth-{depth}", lambda d=depth: clone(forest).set_params(
+            max_depth=d, n_jobs=n_jobs
+        ).fit(X_fit, y_fit)
+    if students:
+        teacher = forest.predict(X_fit)
+        for k, depth in students:
+            yield f"distil-{k}-{depth}", lambda k=k, d=depth: clone(forest).set_params(
+                n_estimators=k, max_depth=d, bootstrap=False, max_features=0.5, n_jobs=n_jobs
+            ).fit(X_fit, teacher)
+
+
+def compact_forest(
+    forest,
+    X_fit,
+    y_fit,
+    X_eval,
+    y_eval,
+    max_bytes=None,
+    max_latency_ms=None,
+    tree_counts=(50, 25, 10),
+    depths=(16, 10, 6),
+    students=((20, 12), (10, 8)),
+    n_jobs=None,
+    predict_n_jobs=None,
+    random_state=42,
+):
+    """Build compact variants of ``forest`` and pick the most accurate within budget.
+
+    ``X_eval``/``y_eval`` are split in half: one half drives tree selection,
+    the other is only used for the reported MAE/R^2. Returns a dict with the
+    chosen ``model`` and its ``name`` plus a ``report`` DataFrame (one row per
+    candidate, the original first) with size, single-row latency, batch
+    latency, MAE, R^2 and whether it meets the budget. If nothing meets the
+    budget the smallest candidate is chosen. Refits use ``n_jobs`` workers
+    (default: the forest's own setting); ``predict_n_jobs``, if given, is set
+    on every model before timing so latency reflects the serving setup.
+    """
+    n_jobs = forest.n_jobs if n_jobs is None else n_jobs
+    rng = np.random.default_rng(random_state)
+    order = rng.permutation(X_eval.shape[0])
+    half = len(order) // 2
+    select_idx, report_idx = order[:half], order[half:]
+    y_eval = np.asarray(y_eval, dtype=float)
+    X_select, y_select = X_eval[select_idx], y_eval[select_idx]
+    X_report, y_report = X_eval[report_idx], y_eval[report_idx]
+
+    def measure(name, model):
+        if predict_n_jobs is not None:
+            model.n_jobs = predict_n_jobs
+        start = time.perf_counter()
+        preds = model.predict(X_report)
+        batch_ms = (time.perf_counter() - start) * 1e3
+        return {
+            "name": name,
+            "trees": len(model.estimators_),
+            "size_mb": model_size_bytes(model) / 2**20,
+            "latency_ms": predict_latency_ms(model, X_report),
+            "batch_ms": batch_ms,
+            "mae": float(mean_absolute_error(y_report, preds)),
+            "r2": float(r2_score(y_report, preds)),
+        }
+
+    rows = [measure("original", forest)]
+    models = {"original": forest}
+    for name, build in _candidates(
+        forest, X_fit, y_fit, X_select, y_select, tree_counts, depths, students, n_jobs
+    ):
+        print(f"[Compact] Building {name}...")
+        models[name] = build()
+        rows.append(measure(name, models[name]))
+
+    report = pd.DataFrame(rows).set_index("name")
+    within = np.ones(len(report), dtype=bool)
+    if max_bytes is not None:
+        within &= report["size_mb"].to_numpy() * 2**20 <= max_bytes
+    if max_latency_ms is not None:
+        within &= report["latency_ms"].to_numpy() <= max_latency_ms
+    report["within_budget"] = within
+
+    if within.any():
+        chosen = report[within]["mae"].idxmin()
+    else:
+        chosen = report["size_mb"].idxmin()
+    return {"name": chosen, "model": models[chosen], "report": report}
@@ -0,0 +1,299 @@
+"""Near-duplicate courses (re-uploads with lightly edited titles) via MinHash and LSH.
+
+Each title is normalised and cut into overlapping character shingles, and a
+MinHash signature (``num_perm`` hashed minima) is computed for it in
+vectorised chunks. The signature is split into ``bands``; courses whose band
+values and subject all agree land in the same bucket, and only those pairs
+are compared. Candidates become duplicates when their estimated title
+Jaccard similarity reaches ``threshold`` and their prices are within
+``price_tolerance`` of each other. Linked courses form clusters (connected
+components). The whole pass is roughly linear in the number of rows.
+
+A dedup policy decides which course of each cluster survives; both
+udemy_analysis.basic_inspection and UdemyMarketEngine take one, defaulting
+to ``UDEMY_NEAR_DUPLICATES`` (``off`` if unset):
+
+    python near_duplicates.py udemy_courses.csv --threshold 0.7 --output clusters.csv
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+_MIX = np.uint64(0x100000001B3)  # FNV-1 prime, folds band values into one key
+CLUSTER_COLUMNS = ["course_title", "price", "subject", "level", "num_subscribers"]
+
+
+class NearDuplicateDetector:
+    """MinHash/LSH clustering of courses by title, constrained by subject and price.
+
+    ``bands`` must divide ``num_perm``; with the defaults (16 bands of 4)
+    pairs at Jaccard 0.7 collide in some band ~99.6% of the time and pairs
+    at 0.3 ~12%. Within a bucket each row is compared with the next
+    ``window`` rows, so one huge bucket cannot make the pass quadratic.
+    Clusters are connected components, so A~B and B~C put A and C together
+    even if they are less similar to each other.
+    """
+
+    def __init__(
+        self,
+        threshold=0.7,
+        num_perm=64,
+        bands=16,
+        shingle_size=4,
+        price_tolerance=0.25,
+        window=10,
+        chunk_rows=4096,
+        seed=0,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"bands ({bands}) must divide num_perm ({num_perm})")
+        if not 1 <= shingle_size <= 8:
+            raise ValueError("shingle_size must be between 1 and 8 characters")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.price_tolerance = price_tolerance
+        self.window = window
+        self.chunk_rows = chunk_rows
+        self.seed = seed
+        self.pairs_ = None
+        self.labels_ = None
+
+    def fit(self, df):
+        """Find near-duplicate pairs and clusters among the rows of ``df``.
+
+        Sets ``pairs_`` (positional ``i < j`` plus estimated ``similarity``)
+        and ``labels_`` (cluster id per row, -1 for rows without duplicates).
+        """
+        titles = normalize_titles(df["course_title"])
+        signatures = self.signatures(titles)
+        subjects = pd.factorize(df["subject"])[0] if "subject" in df else np.zeros(len(df), int)
+        prices = (
+            pd.to_numeric(df["price"], errors="coerce").to_numpy(dtype=float)
+            if "price" in df
+            else np.full(len(df), np.nan)
+        )
+
+        rows = np.flatnonzero(titles.str.len().to_numpy() > 0)  # empty titles match nothing
+        found = []
+        for i, j in self._band_candidates(signatures, subjects, rows):
+            # Verify candidates straight away, in blocks, so only matches are kept
+            similarity = np.count_nonzero(signatures[i] == signatures[j], axis=1) / self.num_perm
+            pi, pj = prices[i], prices[j]
+            close = np.abs(pi - pj) <= self.price_tolerance * np.maximum(pi, pj)
+            keep = (
+                (similarity >= self.threshold)
+                & (subjects[i] == subjects[j])
+                & (close | np.isnan(pi) | np.isnan(pj))
+            )
+            found.append((i[keep], j[keep], similarity[keep]))
+
+        i, j, similarity = (
+            (np.concatenate(parts) for parts in zip(*found))
+            if found
+            else (np.empty(0, np.intp), np.empty(0, np.intp), np.empty(0))
+        )
+        pairs = pd.DataFrame({"i": i, "j": j, "similarity": similarity})
+        self.pairs_ = pairs.drop_duplicates(["i", "j"]).sort_values(["i", "j"], ignore_index=True)
+        self.labels_ = self._cluster(
+            len(df), self.pairs_["i"].to_numpy(), self.pairs_["j"].to_numpy()
+        )
+        return self
+
+    def signatures(self, titles):
+        """MinHash signatures, shape (n_titles, num_perm), of normalised titles.
+
+        Only the low 16 bits of each minimum are kept (b-bit MinHash): two
+        different minima then agree by chance 1 time in 65536, a negligible
+        bias on the similarity estimate, while signatures take 2 * num_perm
+        bytes per row. Everything else is built ``chunk_rows`` titles at a time.
+        """
+        rng = np.random.default_rng(self.seed)
+        # Multiply-shift hashing: ((a * x + b) mod 2^64) >> 32, with a odd
+        a = rng.integers(0, 2**63, size=self.num_perm, dtype=np.uint64) << np.uint64(1)
+        a |= np.uint64(1)
+        b = rng.integers(0, 2**63, size=self.num_perm, dtype=np.uint64)
+        titles = list(titles)
+        out = np.empty((len(titles), self.num_perm), dtype=np.uint16)
+        for start in range(0, len(titles), self.chunk_rows):
+            chunk = titles[start : start + self.chunk_rows]
+            out[start : start + len(chunk)] = self._minhash(chunk, a, b)
+        return out
+
+    def _minhash(self, titles, a, b):
+        k = self.shingle_size
+        encoded = [t.ljust(k).encode() for t in titles]
+        lengths = np.fromiter(map(len, encoded), dtype=np.intp, count=len(encoded))
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+
+        # Shingles as integers (k bytes packed), dropping those that cross titles
+        n_starts = len(data) - k + 1
+        grams = np.zeros(n_starts, dtype=np.uint64)
+        for offset in range(k):
+            grams = (grams << np.uint64(8)) ^ data[offset : offset + n_starts]
+        row_of_byte = np.repeat(np.arange(len(lengths)), lengths)
+        grams = grams[row_of_byte[:n_starts] == row_of_byte[k - 1 :]]
+        # Padded titles have at least one shingle each, so no segment is empty
+        starts = np.concatenate([[0], np.cumsum(lengths - k + 1)[:-1]])
+        hashed = (a[:, None] * grams[None, :] + b[:, None]) >> np.uint64(32)
+        return np.minimum.reduceat(hashed, starts, axis=1).T.astype(np.uint16)
+
+    def _band_candidates(self, signatures, subjects, rows, block=1 << 20):
+        """Blocks of (i, j) pairs among ``rows`` sharing a band's values and subject."""
+        rows_per_band = self.num_perm // self.bands
+        for band in range(self.bands):
+            key = subjects[rows].astype(np.uint64)
+            for col in range(band * rows_per_band, (band + 1) * rows_per_band):
+                key = (key * _MIX) ^ signatures[rows, col].astype(np.uint64)
+            by_key = np.argsort(key, kind="stable")  # rows stay ascending within a bucket
+            order, sorted_keys = rows[by_key], key[by_key]
+            pairs_i, pairs_j = [], []
+            for d in range(1, min(self.window, len(order) - 1) + 1):
+                same = sorted_keys[:-d] == sorted_keys[d:]
+                if not same.any():
+                    break
+                pairs_i.append(order[:-d][same])
+                pairs_j.append(order[d:][same])
+            if pairs_i:
+                pairs_i, pairs_j = np.concatenate(pairs_i), np.concatenate(pairs_j)
+                for start in range(0, len(pairs_i), block):
+                    yield pairs_i[start : start + block], pairs_j[start : start + block]
+
+    @staticmethod
+    def _cluster(n, i, j):
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        labels = np.full(n, -1, dtype=np.intp)
+        if not len(i):
+            return labels
+        graph = coo_matrix((np.ones(len(i)), (i, j)), shape=(n, n))
+        _, components = connected_components(graph, directed=False)
+        sizes = np.bincount(components)
+        in_cluster = sizes[components] > 1
+        # Number clusters by their first row
+        _, first = np.unique(components[in_cluster], return_index=True)
+        renumber = np.empty(sizes.size, dtype=np.intp)
+        roots = components[in_cluster][np.sort(first)]
+        renumber[roots] = np.arange(len(roots))
+        labels[in_cluster] = renumber[components[in_cluster]]
+        return labels
+
+    def clusters(self, df):
+        """Rows of ``df`` in a cluster, with ``cluster`` and ``cluster_size`` columns."""
+        if self.labels_ is None:
+            raise RuntimeError("Call fit() before clusters().")
+        members = self.labels_ >= 0
+        columns = [c for c in CLUSTER_COLUMNS if c in df]
+        out = df.loc[members, columns].copy()
+        out.insert(0, "cluster", self.labels_[members])
+        out.insert(1, "cluster_size", np.bincount(self.labels_[members])[out["cluster"]])
+        return out.sort_values("cluster", kind="stable")
+
+    def keep_mask(self, df, policy="first"):
+        """Boolean mask keeping rows without duplicates plus one row per cluster.
+
+        ``policy`` is a POLICIES name or a callable taking one cluster's rows
+        (a DataFrame) and returning the index label to keep.
+        """
+        if self.labels_ is None:
+            raise RuntimeError("Call fit() before keep_mask().")
+        labels = self.labels_
+        keep = labels < 0
+        if callable(policy):
+            positions = pd.Series(np.arange(len(df)), index=df.index)
+            for _, group in df[~keep].groupby(labels[~keep], sort=False):
+                keep[positions[policy(group)]] = True
+            return keep
+        try:
+            sort_column = POLICIES[policy]
+        except KeyError:
+            raise ValueError(f"Unknown dedup policy {policy!r}; expected one of {list(POLICIES)}")
+        members = np.flatnonzero(~keep)
+        if sort_column is None:
+            order = members  # positions are already ascending: first row wins
+        else:
+            score = pd.to_numeric(df[sort_column], errors="coerce").to_numpy(dtype=float)
+            order = members[np.lexsort((members, -np.nan_to_num(score[members], nan=-np.inf)))]
+        _, first = np.unique(labels[order], return_index=True)
+        keep[order[first]] = True
+        return keep
+
+
+def normalize_titles(titles):
+    """Lowercase, punctuation to spaces, whitespace collapsed; missing titles become ''."""
+    return (
+        pd.Series(titles, dtype=object)
+        .fillna("")
+        .astype(str)
+        .str.lower()
+        .str.replace(r"[\W_]+", " ", regex=True)
+        .str.strip()
+    )
+
+
+# Policy name -> column whose largest value wins in a cluster (None: first row wins)
+POLICIES = {
+    "first": None,
+    "most_subscribers": "num_subscribers",
+    "most_reviews": "num_reviews",
+}
+
+
+def default_policy():
+    return os.environ.get("UDEMY_NEAR_DUPLICATES") or "off"
+
+
+def drop_near_duplicates(df, policy=None, detector=None):
+    """``df`` with near-duplicate courses collapsed according to ``policy``.
+
+    ``policy`` defaults to UDEMY_NEAR_DUPLICATES; ``off`` returns ``df``
+    unchanged. ``detector`` overrides the default NearDuplicateDetector.
+    """
+    policy = policy or default_policy()
+    if policy == "off" or df.empty:
+        return df
+    detector = (detector or NearDuplicateDetector()).fit(df)
+    keep = detector.keep_mask(df, policy)
+    n_clusters = int(detector.labels_.max()) + 1
+    policy_name = getattr(policy, "__name__", policy)
+    print(
+        f"[Dedup] Dropped {int((~keep).sum()):,} near-duplicate rows "
+        f"from {n_clusters:,} clusters (policy: {policy_name})"
+    )
+    return df[keep]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluster near-duplicate courses in a catalog.")
+    parser.add_argument("source")
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--price-tolerance", type=float, default=0.25)
+    parser.add_argument("--output", help="write the clusters to this CSV")
+    args = parser.parse_args()
+
+    from dataset_cache import load_catalog
+
+    df = load_catalog(args.source).drop_duplicates()
+    detector = NearDuplicateDetector(
+        threshold=args.threshold, price_tolerance=args.price_tolerance
+    ).fit(df)
+    clusters = detector.clusters(df)
+    n_clusters = clusters["cluster"].nunique()
+    print(
+        f"[Dedup] {len(df):,} courses: {len(clusters):,} in {n_clusters:,} near-duplicate "
+        f"clusters, {len(clusters) - n_clusters:,} removable"
+    )
+    if args.output:
+        clusters.to_csv(args.output, index=False)
+        print(f"[Dedup] Clusters -> {args.output}")
+    else:
+        print(clusters.head(20).to_string())
+
+
+if __name__ == "__main__":
+    main()
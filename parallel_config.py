@@ -0,0 +1,134 @@
+"""Process-wide parallelism settings shared by market_engine and udemy_analysis.
+
+One ParallelConfig decides how many workers model training uses, which joblib
+backend runs them, how many threads inference may use and how large the
+BLAS/OpenMP thread pools may grow. Defaults come from environment variables so
+each deployment can be tuned without code changes:
+
+    UDEMY_N_JOBS          training workers (-1 = every allotted core)
+    UDEMY_PREDICT_N_JOBS  inference workers per process (default 1)
+    UDEMY_BACKEND         joblib backend: loky, threading or multiprocessing
+    UDEMY_BLAS_THREADS    cap for OpenMP/OpenBLAS/MKL thread pools
+"""
+
+import os
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, replace
+from typing import Iterator, Optional
+
+BACKENDS = ("loky", "threading", "multiprocessing")
+_BLAS_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+def available_cores() -> int:
+    """Cores this process may run on (respects CPU affinity / container pinning)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else None
+
+
+@dataclass(frozen=True)
+class ParallelConfig:
+    n_jobs: int = -1
+    predict_n_jobs: int = 1
+    backend: Optional[str] = None
+    blas_threads: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if self.backend is not None and self.backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {self.backend!r}; expected one of {BACKENDS}")
+        for name in ("n_jobs", "predict_n_jobs"):
+            if getattr(self, name) == 0:
+                raise ValueError(f"{name} must be non-zero")
+
+    @classmethod
+    def from_env(cls) -> "ParallelConfig":
+        defaults = cls()
+        n_jobs = _env_int("UDEMY_N_JOBS")
+        predict_n_jobs = _env_int("UDEMY_PREDICT_N_JOBS")
+        return cls(
+            n_jobs=defaults.n_jobs if n_jobs is None else n_jobs,
+            predict_n_jobs=defaults.predict_n_jobs if predict_n_jobs is None else predict_n_jobs,
+            backend=os.environ.get("UDEMY_BACKEND") or None,
+            blas_threads=_env_int("UDEMY_BLAS_THREADS"),
+        )
+
+    @staticmethod
+    def resolve(n_jobs: int) -> int:
+        """Turn joblib-style counts (-1 = all, -2 = all but one) into a worker count."""
+        cores = available_cores()
+        if n_jobs < 0:
+            return max(1, cores + 1 + n_jobs)
+        return min(n_jobs, cores)
+
+    @property
+    def train_workers(self) -> int:
+        return self.resolve(self.n_jobs)
+
+    @property
+    def predict_workers(self) -> int:
+        return self.resolve(self.predict_n_jobs)
+
+    @contextmanager
+    def training(self) -> Iterator[None]:
+        """Run model fitting on the configured backend/workers with BLAS pools capped."""
+        with ExitStack() as stack:
+            if self.backend is not None:
+                from joblib import parallel_config
+
+                stack.enter_context(
+                    parallel_config(backend=self.backend, n_jobs=self.train_workers)
+                )
+            if self.blas_threads is not None:
+                from threadpoolctl import threadpool_limits
+
+                stack.enter_context(threadpool_limits(limits=self.blas_threads))
+            yield
+
+    def configure_estimator(self, estimator, for_inference: bool = False) -> None:
+        """Point an estimator's n_jobs (if it has one) at the training or inference count."""
+        if hasattr(estimator, "n_jobs"):
+            estimator.n_jobs = self.predict_n_jobs if for_inference else self.n_jobs
+
+
+_config = ParallelConfig.from_env()
+
+
+def get_config() -> ParallelConfig:
+    return _config
+
+
+def set_config(config: Optional[ParallelConfig] = None, **changes) -> ParallelConfig:
+    """Replace the process-wide config, or tweak fields of the current one."""
+    global _config
+    _config = replace(config or _config, **changes)
+    return _config
+
+
+def apply_thread_limits(config: Optional[ParallelConfig] = None) -> None:
+    """Cap BLAS/OpenMP pools for the whole process, e.g. once per server worker.
+
+    Environment variables cover libraries loaded later; threadpoolctl covers
+    the ones numpy/scipy/sklearn have already initialised.
+    """
+    config = config or _config
+    if config.blas_threads is None:
+        return
+    for var in _BLAS_ENV_VARS:
+        os.environ[var] = str(config.blas_threads)
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(limits=config.blas_threads)
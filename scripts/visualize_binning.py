@@ -1,9 +1,14 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import numpy as np
 
-# Load data
-df = pd.read_csv('udemy_courses.csv')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dataset_cache import load_catalog
+
+# Load data (typed columnar cache; only the price column is read)
+df = load_catalog('udemy_courses.csv', columns=['price'])
 
 # Create figure with larger size
 fig, ax = plt.subplots(figsize=(14, 8))
@@ -1,7 +1,12 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 
-df = pd.read_csv('udemy_courses.csv')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dataset_cache import load_catalog
+
+df = load_catalog('udemy_courses.csv')
 
 fig, ax = plt.subplots(figsize=(10, 6))
 ax.axis('off')
@@ -1,9 +1,14 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dataset_cache import load_catalog
+
 # Load data
-df = pd.read_csv('udemy_courses.csv')
+df = load_catalog('udemy_courses.csv')
 
 # Create visualization
 fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
@@ -1,21 +1,29 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dataset_cache import load_catalog
+from near_duplicates import drop_near_duplicates
+
 # Load data
-df = pd.read_csv('udemy_courses.csv')
+df = load_catalog('udemy_courses.csv')
 df_clean = df.drop_duplicates()
+# Re-uploads with lightly edited titles (keep the most subscribed copy)
+df_near = drop_near_duplicates(df_clean, 'most_subscribers')
 
 # Create visualization
 fig, ax = plt.subplots(figsize=(10, 6))
 
-categories = ['Before Cleaning', 'After Cleaning']
-values = [len(df), len(df_clean)]
+categories = ['Before Cleaning', 'Exact Duplicates Removed', 'Near-Duplicates Removed']
+values = [len(df), len(df_clean), len(df_near)]
 
-bars = ax.bar(categories, values, color=['#FF6B6B', '#51CF66'], alpha=0.8, edgecolor='black', linewidth=2)
+bars = ax.bar(categories, values, color=['#FF6B6B', '#51CF66', '#339AF0'], alpha=0.8, edgecolor='black', linewidth=2)
 
 ax.set_ylabel('Number of Rows', fontsize=14)
 ax.set_title('Duplicate Removal: Before vs After', fontsize=16, fontweight='bold')
-ax.set_ylim(3650, 3680)
+ax.set_ylim(min(values) - 20, max(values) + 10)
 
 # Add value labels on bars
 for bar, val in zip(bars, values):
@@ -24,7 +32,8 @@ for bar, val in zip(bars, values):
 
 # Add removed count
 removed = len(df) - len(df_clean)
-ax.text(0.5, 3665, f'Removed: {removed} duplicates', 
+near_removed = len(df_clean) - len(df_near)
+ax.text(1, min(values) - 10, f'Removed: {removed} duplicates + {near_removed} near-duplicates', 
         ha='center', fontsize=12, color='darkred', fontweight='bold',
         bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.5))
 
@@ -1,7 +1,14 @@
+import sys
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 from matplotlib.patches import FancyBboxPatch, Rectangle
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dataset_cache import load_catalog
+from keyword_lift import KeywordLiftTable
+
 # Create figure
 fig, ax = plt.subplots(figsize=(14, 8))
 ax.set_xlim(0, 10)
@@ -53,8 +60,14 @@ power_box = FancyBboxPatch((0.5, 0.5), 4, 2,
                           edgecolor='purple', facecolor='#F5E6FF', linewidth=2)
 ax.add_patch(power_box)
 ax.text(2.5, 2.2, 'Common Power Words', fontsize=12, ha='center', fontweight='bold', color='purple')
-power_keywords = ['Complete', 'Bootcamp', 'Ultimate', 'Master', 'Guide', 
-                 'Pro', 'Expert', 'Beginner', 'Course', '2024']
+# The catalog-wide keywords the engine suggests; illustrative list if the CSV is absent
+try:
+    df = load_catalog('udemy_courses.csv', columns=['course_title', 'num_subscribers'])
+    lift = KeywordLiftTable().fit(df['course_title'], df['num_subscribers'])
+    power_keywords = lift.top_terms(10)
+except FileNotFoundError:
+    power_keywords = ['Complete', 'Bootcamp', 'Ultimate', 'Master', 'Guide',
+                     'Pro', 'Expert', 'Beginner', 'Course', '2024']
 ax.text(2.5, 1.7, ' • '.join(power_keywords[:5]), fontsize=9, ha='center')
 ax.text(2.5, 1.3, ' • '.join(power_keywords[5:]), fontsize=9, ha='center')
 ax.text(2.5, 0.8, 'These words correlate with higher enrollments!', 
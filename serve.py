@@ -0,0 +1,355 @@
+"""Local HTTP/JSON prediction service around UdemyMarketEngine (asyncio, stdlib only).
+
+Concurrent /predict requests are coalesced into micro-batches (flushed after
+``window_ms`` or ``max_batch`` rows, whichever comes first) and scored with one
+predict_courses call; identical in-flight requests share a single slot.
+
+    python serve.py --port 8000 --window-ms 2 --max-batch 64
+    python serve.py --compiled   # prediction-only artifact, starts without scikit-learn
+
+Endpoints:
+    POST /predict        {"title", "price", "subject", "level"} or {"courses": [...]}
+    GET  /health         model/version status
+    GET  /metrics        request latency percentiles and batching counters
+    GET  /metrics/stages engine stage timings, Prometheus text format (enable
+                         with --stage-metrics or UDEMY_METRICS=1)
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+from market_engine import (
+    COMPILED_MODEL_FILE,
+    DATA_FILE,
+    MODEL_FILE,
+    RESULT_COLUMNS,
+    UdemyMarketEngine,
+)
+from parallel_config import apply_thread_limits
+
+REQUIRED_FIELDS = ("title", "price", "subject", "level")
+MAX_BODY_BYTES = 1 << 20
+_BAD_LENGTH = object()  # _read_request body marker for a non-numeric or negative Content-Length
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class LatencyTracker:
+    """Rolling window of request latencies plus batching counters."""
+
+    def __init__(self, window=10_000):
+        self._samples = deque(maxlen=window)
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.batched_rows = 0
+        self.deduplicated = 0
+        self.errors = 0
+
+    def record(self, seconds, rows=1):
+        self._samples.append(seconds)
+        self.requests += 1
+        self.rows += rows
+
+    def snapshot(self):
+        samples = np.fromiter(self._samples, dtype=float)
+        latency = {}
+        if len(samples):
+            for q in (50, 90, 95, 99):
+                latency[f"p{q}_ms"] = float(np.percentile(samples, q) * 1e3)
+            latency["max_ms"] = float(samples.max() * 1e3)
+        return {
+            "requests": self.requests,
+            "rows": self.rows,
+            "errors": self.errors,
+            "batches": self.batches,
+            "mean_batch_size": self.batched_rows / self.batches if self.batches else 0.0,
+            "deduplicated": self.deduplicated,
+            "latency": latency,
+        }
+
+
+class MicroBatcher:
+    """Collects scoring requests and runs them through the engine in batches."""
+
+    def __init__(self, engine, window_ms=2.0, max_batch=64, stats=None):
+        self.engine = engine
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.stats = stats or LatencyTracker()
+        self._queue = asyncio.Queue()
+        self._in_flight = {}
+        self._worker = None
+
+    def start(self):
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+
+    def submit(self, course):
+        """Future resolving to the prediction dict; duplicates share one future."""
+        key = self.engine._cache_key(
+            course["title"], course["price"], course["subject"], course["level"]
+        )
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats.deduplicated += 1
+            return future
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self._queue.put_nowait((key, course, future))
+        return future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._score(batch)
+
+    async def _score(self, batch):
+        frame = pd.DataFrame([course for _, course, _ in batch], columns=list(REQUIRED_FIELDS))
+        try:
+            # The forest releases the GIL; keep the event loop free while it runs
+            scored = await asyncio.get_running_loop().run_in_executor(
+                None, self.engine.predict_courses, frame
+            )
+        except Exception as e:
+            for key, _, future in batch:
+                self._in_flight.pop(key, None)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats.batches += 1
+        self.stats.batched_rows += len(batch)
+        records = scored[list(RESULT_COLUMNS)].to_dict("records")
+        for (key, _, future), record in zip(batch, records):
+            self._in_flight.pop(key, None)
+            if not future.done():
+                future.set_result(_jsonable(record))
+
+
+def _jsonable(record):
+    out = {}
+    for name, value in record.items():
+        if isinstance(value, (np.floating, float)):
+            value = None if math.isnan(value) else float(value)
+        elif isinstance(value, np.integer):
+            value = int(value)
+        out[name] = value
+    return out
+
+
+def _validate(course):
+    if not isinstance(course, dict):
+        raise ValueError("each course must be a JSON object")
+    missing = [f for f in REQUIRED_FIELDS if f not in course]
+    if missing:
+        raise ValueError(f"missing fields: {missing}")
+    price = float(course["price"])
+    if not math.isfinite(price) or price < 0:
+        raise ValueError("price must be a non-negative number")
+    return {
+        "title": str(course["title"]),
+        "price": price,
+        "subject": str(course["subject"]),
+        "level": str(course["level"]),
+    }
+
+
+class PredictionServer:
+    """Minimal HTTP/1.1 (keep-alive) JSON server in front of a MicroBatcher."""
+
+    def __init__(self, engine, host="127.0.0.1", port=8000, window_ms=2.0, max_batch=64):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.stats = LatencyTracker()
+        self.batcher = MicroBatcher(engine, window_ms, max_batch, self.stats)
+        self.started_at = time.time()
+
+    async def serve_forever(self):
+        self.batcher.start()
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"[Serve] Listening on http://{self.host}:{self.port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                if body is _BAD_LENGTH:
+                    self.stats.errors += 1
+                    status, payload = 400, {"error": "invalid Content-Length"}
+                else:
+                    status, payload = await self._dispatch(method, path, body)
+                # An oversized or unparseable body was never read off the socket,
+                # so the stream is unusable
+                keep_alive = (
+                    isinstance(body, bytes) and headers.get("connection", "").lower() != "close"
+                )
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return None
+        path = path.split("?", 1)[0]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            return method, path, headers, _BAD_LENGTH
+        if length > MAX_BODY_BYTES:
+            return method, path, headers, None
+        body = await reader.readexactly(length) if length else b""
+        return method, path, headers, body
+
+    async def _dispatch(self, method, path, body):
+        if path == "/health":
+            model = self.engine.model
+            return 200, {
+                "status": "ok",
+                "model_trees": getattr(model, "n_trees", None)
+                or len(getattr(model, "estimators_", [])),
+                "compiled": self.engine.compiled_,
+                "data_hash": self.engine.data_hash_,
+                "uptime_s": round(time.time() - self.started_at, 3),
+            }
+        if path == "/metrics":
+            return 200, self.stats.snapshot()
+        if path == "/metrics/stages":
+            return 200, self.engine.stage_metrics.to_prometheus()
+        if path != "/predict":
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        if body is None:
+            return 413, {"error": f"body exceeds {MAX_BODY_BYTES} bytes"}
+
+        started = time.perf_counter()
+        try:
+            payload = json.loads(body or b"{}")
+            batch = isinstance(payload, dict) and "courses" in payload
+            courses = payload["courses"] if batch else [payload]
+            if not isinstance(courses, list):
+                raise ValueError("'courses' must be a list")
+            courses = [_validate(c) for c in courses]
+        except (ValueError, TypeError) as e:
+            self.stats.errors += 1
+            return 400, {"error": str(e)}
+
+        try:
+            results = await asyncio.gather(*(self.batcher.submit(c) for c in courses))
+        except Exception as e:
+            self.stats.errors += 1
+            return 500, {"error": str(e)}
+        self.stats.record(time.perf_counter() - started, rows=len(courses))
+        return 200, {"predictions": results} if batch else results[0]
+
+    @staticmethod
+    def _write_response(writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), "text/plain; version=0.0.4"
+        else:
+            body, content_type = json.dumps(payload).encode(), "application/json"
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--data", default=DATA_FILE)
+    parser.add_argument("--model", default=None, help=f"default: {MODEL_FILE}")
+    parser.add_argument(
+        "--compiled",
+        action="store_true",
+        help=f"serve a compiled artifact (default: {COMPILED_MODEL_FILE})",
+    )
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument(
+        "--stage-metrics", action="store_true", help="record per-stage engine timings"
+    )
+    args = parser.parse_args()
+
+    apply_thread_limits()
+    if args.stage_metrics:
+        instrumentation.enable()
+    model_path = args.model or (COMPILED_MODEL_FILE if args.compiled else MODEL_FILE)
+    engine = UdemyMarketEngine.load_or_train(
+        data_path=args.data, model_path=model_path, compiled=args.compiled
+    )
+    server = PredictionServer(
+        engine, args.host, args.port, window_ms=args.window_ms, max_batch=args.max_batch
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\n[Serve] Stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Inverted index over TF-IDF title vectors for top-k comparable-course lookups."""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+META_COLUMNS = ["course_title", "price", "num_subscribers", "subject", "level"]
+
+
+class SimilarCourseIndex:
+    """Cosine top-k over L2-normalised TF-IDF rows via per-term posting lists.
+
+    The title matrix is stored column-major (CSC), so each vocabulary term's
+    column is its posting list: the courses containing it and their weights.
+    A query only touches the postings of its own terms instead of scanning
+    the catalog. Terms whose posting list is longer than ``max_postings`` are
+    too common to discriminate; they only re-score candidates found through
+    rarer terms, which keeps lookups cheap on very large catalogs.
+    """
+
+    def __init__(self, title_vectors, courses, max_postings=50_000):
+        self.max_postings = max_postings
+        self._postings = sparse.csc_matrix(title_vectors, dtype=np.float32)
+        self._postings.sort_indices()
+        self._meta = courses[META_COLUMNS].reset_index(drop=True)
+        self._index_filters()
+
+    def __len__(self):
+        return self._postings.shape[0]
+
+    def extend(self, title_vectors, courses):
+        """Append newly arrived courses (same vocabulary) to the index."""
+        rows = sparse.csc_matrix(title_vectors, dtype=np.float32)
+        self._postings = sparse.vstack([self._postings, rows], format="csc")
+        self._postings.sort_indices()
+        self._meta = pd.concat(
+            [self._meta, courses[META_COLUMNS].reset_index(drop=True)], ignore_index=True
+        )
+        self._index_filters()
+
+    def query(self, terms, weights, k=5, subject=None, level=None):
+        """Top-k courses for a query given as vocabulary column ids and TF-IDF weights.
+
+        Returns a list of dicts with the course metadata and a ``similarity``
+        score, best first; optionally restricted to one subject and/or level.
+        """
+        terms = np.asarray(terms, dtype=np.intp)
+        weights = np.asarray(weights, dtype=np.float32)
+        if not len(terms):
+            return []
+
+        indptr, indices, data = (
+            self._postings.indptr,
+            self._postings.indices,
+            self._postings.data,
+        )
+        lengths = indptr[terms + 1] - indptr[terms]
+        rare = lengths <= self.max_postings
+        if not rare.any():
+            # Only very common terms: fall back to the shortest of them
+            rare = lengths == lengths.min()
+
+        # Accumulate scores from the discriminative terms
+        docs, contrib = [], []
+        for j, w in zip(terms[rare], weights[rare]):
+            lo, hi = indptr[j], indptr[j + 1]
+            docs.append(indices[lo:hi])
+            contrib.append(data[lo:hi] * w)
+        candidates, inverse = np.unique(np.concatenate(docs), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(contrib)).astype(np.float32)
+
+        # Common terms only add to courses that are already candidates
+        for j, w in zip(terms[~rare], weights[~rare]):
+            lo, hi = indptr[j], indptr[j + 1]
+            pos = np.searchsorted(indices[lo:hi], candidates)
+            pos = np.minimum(pos, hi - lo - 1)
+            hit = indices[lo:hi][pos] == candidates
+            scores[hit] += data[lo:hi][pos[hit]] * w
+
+        mask = self._filter_mask(candidates, subject, level)
+        candidates, scores = candidates[mask], scores[mask]
+        if not len(candidates):
+            return []
+
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        rows = self._meta.iloc[candidates[top]]
+        results = rows.to_dict("records")
+        for record, score in zip(results, scores[top]):
+            record["similarity"] = float(score)
+        return results
+
+    def _index_filters(self):
+        self._subject_codes, self._subjects = pd.factorize(self._meta["subject"])
+        self._level_codes, self._levels = pd.factorize(self._meta["level"])
+
+    def _filter_mask(self, candidates, subject, level):
+        mask = np.ones(len(candidates), dtype=bool)
+        for value, codes, labels in (
+            (subject, self._subject_codes, self._subjects),
+            (level, self._level_codes, self._levels),
+        ):
+            if value is None:
+                continue
+            code = labels.get_indexer([value])[0]
+            mask &= codes[candidates] == code
+        return mask
@@ -0,0 +1,308 @@
+"""Synthetic Udemy catalogs with the udemy_courses.csv schema, at any size.
+
+Distributions are fit from a real catalog when one is available (per-subject
+title vocabulary and title lengths, level mix per subject, observed price
+points, log-normal subscribers by subject and paid/free, review rates,
+lecture counts, durations and publish years); otherwise built-in defaults
+shaped like the Kaggle dataset are used. Rows are generated and written in
+chunks, so memory stays bounded by ``chunk_size`` regardless of catalog size.
+
+    python synthetic_catalog.py --rows 1000000 --output catalog_1m.csv --seed 0
+"""
+
+import argparse
+import re
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import load_catalog
+
+COLUMNS = [
+    "course_id",
+    "course_title",
+    "url",
+    "is_paid",
+    "price",
+    "num_subscribers",
+    "num_reviews",
+    "num_lectures",
+    "level",
+    "content_duration",
+    "published_timestamp",
+    "subject",
+]
+_WORD = re.compile(r"[A-Za-z0-9+#.'-]+")
+
+_DEFAULT_VOCAB = {
+    "Business Finance": "Complete Financial Analysis Trading Stock Forex Accounting Excel "
+    "Investing Options Beginners Guide Course Master Market Technical Strategy Modeling "
+    "Bootcamp Cryptocurrency Bitcoin Real Estate Portfolio Risk Management Day",
+    "Graphic Design": "Photoshop Illustrator Design Logo Graphic Adobe Complete Course "
+    "Beginners Master InDesign Drawing Typography Branding Guide Creative Photo Editing "
+    "Art Digital Vector Class Ultimate Essentials",
+    "Musical Instruments": "Guitar Piano Learn Lessons Beginner Play Songs Course Complete "
+    "Chords Blues Jazz Music Theory Acoustic Electric Violin Drums Ukulele Harmonica "
+    "Fingerstyle Technique Master Method",
+    "Web Development": "Web Development JavaScript Complete HTML CSS Python Bootcamp PHP "
+    "WordPress Learn React Angular Node.js Beginners Course Build Website Master jQuery "
+    "Responsive Django Ruby Rails Developer Full Stack API",
+}
+
+
+class CatalogProfile:
+    """Marginal and conditional distributions used to draw synthetic courses."""
+
+    def __init__(
+        self,
+        subjects,
+        level_probs,
+        prices,
+        vocab,
+        title_lengths,
+        log_subs,
+        review_rate,
+        lectures,
+        duration,
+        years,
+    ):
+        self.subjects = subjects  # {subject: probability}
+        self.level_probs = level_probs  # {subject: {level: probability}}
+        self.prices = prices  # {price: probability}
+        self.vocab = vocab  # {subject: (words, probabilities)}
+        self.title_lengths = title_lengths  # {n_words: probability}
+        self.log_subs = log_subs  # {(subject, is_paid): (mu, sigma)} of log1p(subs)
+        self.review_rate = review_rate  # (mu, sigma) of log(reviews / subs)
+        self.lectures = lectures  # (mu, sigma) of log(num_lectures)
+        self.duration = duration  # (mu, sigma) of log(hours)
+        self.years = years  # {year: probability}
+
+    @classmethod
+    def from_frame(cls, df, vocab_size=2000):
+        df = df.dropna(subset=["course_title", "subject", "level", "price", "num_subscribers"])
+        subjects = _probs(df["subject"])
+        by_subject = df.groupby("subject", observed=True)
+        level_probs = {s: _probs(g["level"]) for s, g in by_subject}
+        prices = _probs(pd.to_numeric(df["price"], errors="coerce").dropna().round(2))
+
+        vocab = {}
+        for subject, group in by_subject:
+            counts = Counter()
+            for title in group["course_title"].astype(str):
+                counts.update(_WORD.findall(title))
+            words, freq = zip(*counts.most_common(vocab_size))
+            freq = np.asarray(freq, dtype=float)
+            vocab[subject] = (np.asarray(words, dtype=object), freq / freq.sum())
+        lengths = df["course_title"].astype(str).map(lambda t: len(_WORD.findall(t)))
+        title_lengths = _probs(lengths.clip(1, 15))
+
+        subs = df["num_subscribers"].astype(float)
+        paid = pd.to_numeric(df["price"], errors="coerce").fillna(0) > 0
+        log_subs = {}
+        by_segment = np.log1p(subs).groupby([df["subject"], paid], observed=True)
+        for (subject, is_paid), group in by_segment:
+            log_subs[(subject, bool(is_paid))] = (float(group.mean()), float(group.std() or 1.0))
+
+        def lognormal(values):
+            values = np.log(values[values > 0])
+            return (float(values.mean()), float(values.std() or 0.5))
+
+        rate = (df["num_reviews"] / subs.where(subs > 0)).dropna() if "num_reviews" in df else None
+        years = pd.to_datetime(df.get("published_timestamp"), errors="coerce", utc=True).dt.year
+        default = cls.default()
+        return cls(
+            subjects=subjects,
+            level_probs=level_probs,
+            prices=prices,
+            vocab=vocab,
+            title_lengths=title_lengths,
+            log_subs=log_subs,
+            review_rate=lognormal(rate.to_numpy()) if rate is not None else default.review_rate,
+            lectures=lognormal(df["num_lectures"].to_numpy(dtype=float))
+            if "num_lectures" in df
+            else default.lectures,
+            duration=lognormal(df["content_duration"].to_numpy(dtype=float))
+            if "content_duration" in df
+            else default.duration,
+            years=_probs(years.dropna().astype(int)) if years.notna().any() else default.years,
+        )
+
+    @classmethod
+    def default(cls):
+        subjects = {
+            "Web Development": 0.326,
+            "Business Finance": 0.325,
+            "Musical Instruments": 0.185,
+            "Graphic Design": 0.164,
+        }
+        levels = {
+            "All Levels": 0.524,
+            "Beginner Level": 0.345,
+            "Intermediate Level": 0.115,
+            "Expert Level": 0.016,
+        }
+        price_points = [0, 20, 25, 30, 40, 50, 95, 100, 120, 200]
+        price_weights = np.array([8.5, 22, 8, 5, 6, 12, 3, 5, 3, 8])
+        vocab = {}
+        for subject, words in _DEFAULT_VOCAB.items():
+            words = np.asarray(words.split(), dtype=object)
+            # Zipf-like weights: earlier words are more common
+            weights = 1.0 / np.arange(1, len(words) + 1)
+            vocab[subject] = (words, weights / weights.sum())
+        log_subs = {}
+        for subject in subjects:
+            log_subs[(subject, True)] = (6.0, 1.7)
+            log_subs[(subject, False)] = (7.6, 1.4)
+        return cls(
+            subjects=subjects,
+            level_probs={s: levels for s in subjects},
+            prices=dict(zip(price_points, price_weights / price_weights.sum())),
+            vocab=vocab,
+            title_lengths={3: 0.1, 4: 0.2, 5: 0.25, 6: 0.2, 7: 0.15, 8: 0.1},
+            log_subs=log_subs,
+            review_rate=(-3.4, 1.1),
+            lectures=(3.3, 0.8),
+            duration=(1.1, 0.9),
+            years={2011: 0.01, 2012: 0.13, 2013: 0.09, 2014: 0.13, 2015: 0.29, 2016: 0.31, 2017: 0.04},
+        )
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls.from_frame(load_catalog(path))
+
+
+def _probs(series):
+    counts = series.value_counts(normalize=True)
+    counts = counts[counts > 0]  # categoricals also list unused categories
+    return dict(zip(counts.index.tolist(), counts.to_numpy(dtype=float)))
+
+
+def _choice(rng, table, size):
+    keys = list(table)
+    probs = np.asarray([table[k] for k in keys], dtype=float)
+    idx = rng.choice(len(keys), size=size, p=probs / probs.sum())
+    return np.asarray(keys, dtype=object)[idx]
+
+
+def generate_chunk(profile, n_rows, rng, start_id=0):
+    """One DataFrame of ``n_rows`` synthetic courses (ids start at ``start_id``)."""
+    subjects = _choice(rng, profile.subjects, n_rows)
+    levels = np.empty(n_rows, dtype=object)
+    titles = np.empty(n_rows, dtype=object)
+    lengths = _choice(rng, profile.title_lengths, n_rows).astype(int)
+    for subject in profile.subjects:
+        mask = subjects == subject
+        n = int(mask.sum())
+        if not n:
+            continue
+        levels[mask] = _choice(rng, profile.level_probs[subject], n)
+        words, probs = profile.vocab[subject]
+        # Oversample, then drop repeats within a title ("Web Web JavaScript")
+        drawn = words[rng.choice(len(words), size=(n, 2 * int(lengths.max())), p=probs)]
+        titles[mask] = [
+            " ".join(list(dict.fromkeys(row))[:k]) for row, k in zip(drawn, lengths[mask])
+        ]
+
+    prices = _choice(rng, profile.prices, n_rows).astype(float)
+    is_paid = prices > 0
+    mu = np.empty(n_rows)
+    sigma = np.empty(n_rows)
+    for (subject, paid), (m, s) in profile.log_subs.items():
+        mask = (subjects == subject) & (is_paid == paid)
+        mu[mask], sigma[mask] = m, s
+    subscribers = np.expm1(rng.normal(mu, sigma)).clip(0).round().astype(np.int64)
+    rate = np.exp(rng.normal(*profile.review_rate, n_rows)).clip(0, 1)
+    reviews = (subscribers * rate).round().astype(np.int64)
+
+    duration = np.exp(rng.normal(*profile.duration, n_rows)).clip(0.5, 80).round(1)
+    lectures = np.exp(rng.normal(*profile.lectures, n_rows)).clip(5, 800).round().astype(int)
+
+    years = _choice(rng, profile.years, n_rows).astype(int)
+    year_start = pd.to_datetime(years.astype(str), format="%Y", utc=True)
+    offsets = pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, n_rows), unit="s")
+    published = (year_start + offsets).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    ids = np.arange(start_id, start_id + n_rows)
+    slugs = pd.Series(titles).str.lower().str.replace(r"[^a-z0-9]+", "-", regex=True)
+    urls = "https://www.udemy.com/" + slugs + "-" + pd.Series(ids).astype(str) + "/"
+
+    return pd.DataFrame(
+        {
+            "course_id": ids,
+            "course_title": titles,
+            "url": urls.to_numpy(),
+            "is_paid": is_paid,
+            "price": prices,
+            "num_subscribers": subscribers,
+            "num_reviews": reviews,
+            "num_lectures": lectures,
+            "level": levels,
+            "content_duration": duration,
+            "published_timestamp": np.asarray(published),
+            "subject": subjects,
+        },
+        columns=COLUMNS,
+    )
+
+
+def generate_chunks(n_rows, chunk_size=100_000, seed=0, profile=None):
+    """Yield DataFrames totalling ``n_rows``; same seed and chunk_size, same output."""
+    profile = profile or CatalogProfile.default()
+    for start in range(0, n_rows, chunk_size):
+        rng = np.random.default_rng([seed, start // chunk_size])
+        yield generate_chunk(profile, min(chunk_size, n_rows - start), rng, start_id=start)
+
+
+def write_catalog(path, n_rows, chunk_size=100_000, seed=0, source=None, profile=None):
+    """Stream a synthetic catalog to ``path`` (.csv, or .parquet with pyarrow installed).
+
+    ``source`` is a real catalog CSV to fit the profile from; without it (or
+    if it does not exist) the built-in default profile is used.
+    """
+    if profile is None:
+        if source is not None and Path(source).exists():
+            profile = CatalogProfile.from_csv(source)
+        else:
+            profile = CatalogProfile.default()
+
+    path = Path(path)
+    chunks = generate_chunks(n_rows, chunk_size, seed, profile)
+    if path.suffix == ".parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Writing .parquet catalogs requires pyarrow") from e
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Udemy catalog.")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--output", required=True, help=".csv or .parquet path")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--source", default="udemy_courses.csv", help="real catalog to mimic")
+    args = parser.parse_args()
+
+    path = write_catalog(args.output, args.rows, args.chunk_size, args.seed, args.source)
+    print(f"Saved {args.rows:,} synthetic courses -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import numpy as np
+
+from udemy_analysis import binned_kde
+
+
+def test_binned_kde_empty_input_gives_flat_curve():
+    x, density = binned_kde(np.array([]), 0.0, 200.0, grid=64)
+    assert x.shape == density.shape == (64,)
+    assert not density.any()
+
+
+def test_binned_kde_constant_input_gives_flat_curve():
+    x, density = binned_kde(np.full(500, 20.0), 19.5, 20.5, grid=64)
+    assert x.shape == density.shape == (64,)
+    assert np.isfinite(density).all() and not density.any()
+
+
+def test_binned_kde_integrates_to_one():
+    values = np.random.default_rng(0).normal(100.0, 15.0, 10_000)
+    x, density = binned_kde(values, 0.0, 200.0)
+    assert abs(density.sum() * (x[1] - x[0]) - 1.0) < 0.01
@@ -0,0 +1,90 @@
+"""Beam search over title rewrites, scored in batches by a trained UdemyMarketEngine."""
+
+import numpy as np
+
+
+class TitleOptimizer:
+    """Search title variants built from high-lift vocabulary terms.
+
+    Each round expands every title in the beam by inserting a keyword,
+    swapping one word for a keyword or dropping one word. All new variants of
+    a round are scored with one feature build and one model call, and only the
+    ``beam_width`` best survive into the next round.
+    """
+
+    def __init__(self, engine, n_keywords=25, beam_width=8, depth=2):
+        self.engine = engine
+        self.n_keywords = n_keywords
+        self.beam_width = beam_width
+        self.depth = depth
+
+    def keywords(self):
+        return self.engine.title_keywords(self.n_keywords)
+
+    def optimize(self, title, price, subject, level, top_k=5):
+        """Return the original score and the top_k rewrites by predicted subscribers."""
+        keywords = [term.title() for term in self.keywords()]
+        analyzer = self.engine.vectorizer.build_analyzer()
+        vocab = self.engine.vectorizer.vocabulary_
+
+        original_words = title.split()
+        original_score = self._score([title], price, subject, level)[0]
+        # Bag-of-words model: titles with the same in-vocabulary tokens score the same
+        seen = {self._signature(analyzer, vocab, title)}
+        beam = [(original_words, ())]
+        results = []
+        evaluated = 1
+
+        for _ in range(self.depth):
+            variants = []
+            for words, edits in beam:
+                for new_words, edit in self._expand(words, keywords):
+                    text = " ".join(new_words)
+                    signature = self._signature(analyzer, vocab, text)
+                    if not new_words or signature in seen:
+                        continue
+                    seen.add(signature)
+                    variants.append((new_words, edits + (edit,), text))
+            if not variants:
+                break
+
+            scores = self._score([text for _, _, text in variants], price, subject, level)
+            evaluated += len(variants)
+            order = np.argsort(-scores)
+            for i in order[: max(top_k, self.beam_width)]:
+                _, edits, text = variants[i]
+                results.append(
+                    {"title": text, "prediction": float(scores[i]), "edits": list(edits)}
+                )
+            beam = [variants[i][:2] for i in order[: self.beam_width]]
+
+        results.sort(key=lambda r: r["prediction"], reverse=True)
+        return {
+            "original": {"title": title, "prediction": float(original_score)},
+            "candidates": results[:top_k],
+            "evaluated": evaluated,
+        }
+
+    def _score(self, titles, price, subject, level):
+        n = len(titles)
+        features = self.engine._prepare_batch(
+            titles=titles, prices=[price] * n, subjects=[subject] * n, levels=[level] * n
+        )
+        return self.engine._predict(features)
+
+    @staticmethod
+    def _signature(analyzer, vocab, text):
+        return tuple(sorted(t for t in analyzer(text) if t in vocab))
+
+    @staticmethod
+    def _expand(words, keywords):
+        present = {w.lower() for w in words}
+        for kw in keywords:
+            if kw.lower() in present:
+                continue
+            yield [kw] + words, f"insert '{kw}'"
+            for i, word in enumerate(words):
+                yield words[:i] + [kw] + words[i + 1 :], f"swap '{word}' -> '{kw}'"
+        if len(words) > 1:
+            for i, word in enumerate(words):
+                yield words[:i] + words[i + 1 :], f"drop '{word}'"
@@ -1,30 +1,59 @@
+import hashlib
+import inspect
+import json
+import os
 import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
-from sklearn.compose import ColumnTransformer
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.impute import SimpleImputer
-from sklearn.metrics import mean_absolute_error, r2_score
-from sklearn.model_selection import train_test_split
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from dataset_cache import load_catalog
+from model_backends import get_backend
+from near_duplicates import drop_near_duplicates
+from parallel_config import ParallelConfig, get_config
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+    from sklearn.pipeline import Pipeline
 
 warnings.filterwarnings("ignore", category=FutureWarning)
-sns.set(style="whitegrid", palette="crest")
 
 DATA_FILE = "udemy_courses.csv"
 OUTPUT_DIR = Path("outputs")
-
-
-def load_data(data_file: str = DATA_FILE) -> pd.DataFrame:
-    """Load the Udemy dataset, with a small fallback sample if missing."""
+SAVE_DPI = 150
+# Above this many rows, scatter/KDE figures switch to pre-aggregated drawing
+LARGE_PLOT_ROWS = int(os.environ.get("UDEMY_LARGE_PLOT_ROWS", 100_000))
+_plot_modules = None
+
+
+def _plotting():
+    """matplotlib.pyplot and seaborn, imported and themed on first use."""
+    global _plot_modules
+    if _plot_modules is None:
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        sns.set(style="whitegrid", palette="crest")
+        _plot_modules = plt, sns
+    return _plot_modules
+
+
+def load_data(
+    data_file: str = DATA_FILE,
+    columns: Optional[List[str]] = None,
+    cache: Optional[bool] = None,
+    compact: Optional[bool] = None,
+) -> pd.DataFrame:
+    """Load the Udemy dataset (typed and compacted, via dataset_cache).
+
+    Falls back to a small built-in sample if the file is missing.
+    """
     try:
-        df = pd.read_csv(data_file)
+        df = load_catalog(data_file, columns=columns, cache=cache, compact=compact)
         print(f"Loaded dataset from {data_file} with shape {df.shape}")
     except FileNotFoundError:
         print(f"Dataset {data_file} not found; using small fallback sample.")
@@ -62,7 +91,14 @@ def load_data(data_file: str = DATA_FILE) -> pd.DataFrame:
     return df
 
 
-def basic_inspection(df: pd.DataFrame) -> pd.DataFrame:
+def basic_inspection(
+    df: pd.DataFrame, near_duplicates: Optional[Union[str, Callable]] = None
+) -> pd.DataFrame:
+    """Print basics and drop exact duplicates, then near-duplicates per the given policy.
+
+    ``near_duplicates`` is a near_duplicates policy (default:
+    UDEMY_NEAR_DUPLICATES, ``off`` if unset).
+    """
     print("\n--- TEMPO 1: BASICS ---")
     print("First 5 rows:\n", df.head())
     print("\nDataset Info:")
@@ -70,24 +106,45 @@ def basic_inspection(df: pd.DataFrame) -> pd.DataFrame:
     print(f"\nShape before dropping duplicates: {df.shape}")
     df = df.drop_duplicates()
     print(f"Shape after dropping duplicates: {df.shape}")
+    deduped = drop_near_duplicates(df, near_duplicates)
+    if deduped is not df:
+        df = deduped
+        print(f"Shape after dropping near-duplicates: {df.shape}")
     print("\nMissing Values per column:\n", df.isnull().sum())
     return df
 
 
-def clean_and_cast(df: pd.DataFrame) -> pd.DataFrame:
+FILL_COLUMNS = ["price", "num_subscribers", "num_reviews"]
+
+
+def clean_and_cast(
+    df: pd.DataFrame, fill_values: Optional[Dict[str, float]] = None
+) -> pd.DataFrame:
+    """Coerce types, fill gaps and drop rows without a timestamp.
+
+    Numeric gaps are filled with ``fill_values`` (column -> value) when
+    given, e.g. catalog-wide medians when cleaning chunk by chunk, and with
+    this frame's medians otherwise.
+    """
     df = df.copy()
     df["published_timestamp"] = pd.to_datetime(df["published_timestamp"], errors="coerce")
     df["is_paid"] = df["is_paid"].astype("bool", errors="ignore")
     # Coerce prices to numeric in case the column is read as text
     df["price"] = pd.to_numeric(df.get("price"), errors="coerce")
     # Fill simple numeric gaps so plots/modeling do not break
-    for col in ["price", "num_subscribers", "num_reviews"]:
+    for col in FILL_COLUMNS:
         if col in df:
-            df[col] = df[col].fillna(df[col].median())
+            fill = df[col].median() if fill_values is None else fill_values[col]
+            df[col] = df[col].fillna(fill)
     # Fill text gaps with a placeholder
     for col in ["level", "subject", "course_title", "url"]:
         if col in df:
-            df[col] = df[col].fillna("Unknown")
+            values = df[col]
+            # Categorical columns (see dataset_cache.compact_frame) need the label first
+            if isinstance(values.dtype, pd.CategoricalDtype) and values.isna().any():
+                if "Unknown" not in values.cat.categories:
+                    values = values.cat.add_categories("Unknown")
+            df[col] = values.fillna("Unknown")
     # Convert is_paid to int for modeling stability
     if "is_paid" in df:
         df["is_paid"] = df["is_paid"].astype(int)
@@ -109,16 +166,19 @@ def add_features(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def save_plot(fig: plt.Figure, name: str) -> None:
+def save_plot(fig: "plt.Figure", name: str, tight: bool = True) -> None:
+    plt, _ = _plotting()
     OUTPUT_DIR.mkdir(exist_ok=True)
     path = OUTPUT_DIR / name
-    fig.tight_layout()
-    fig.savefig(path, dpi=150)
+    if tight:
+        fig.tight_layout()
+    fig.savefig(path, dpi=SAVE_DPI)
     plt.close(fig)
     print(f"Saved figure -> {path}")
 
 
 def plot_subject_counts(df: pd.DataFrame) -> None:
+    plt, sns = _plotting()
     fig, ax = plt.subplots(figsize=(10, 5))
     sns.countplot(x="subject", data=df, order=df["subject"].value_counts().index, ax=ax)
     ax.set_title("Number of Courses per Subject")
@@ -128,25 +188,162 @@ def plot_subject_counts(df: pd.DataFrame) -> None:
     save_plot(fig, "subject_counts.png")
 
 
-def plot_price_distribution(df: pd.DataFrame) -> None:
+def _use_large_mode(df: pd.DataFrame, large: Optional[bool]) -> bool:
+    return len(df) > LARGE_PLOT_ROWS if large is None else large
+
+
+def binned_kde(
+    values: np.ndarray, lo: float, hi: float, grid: int = 512
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Gaussian KDE (Scott's bandwidth) of ``values`` on ``grid`` points over [lo, hi].
+
+    The values are first counted into ``grid`` bins and the counts smoothed
+    with a sampled kernel, so evaluation costs O(grid) after one O(n)
+    histogram. Returns (x, density) with density integrating to ~1, or a
+    flat zero curve when ``values`` is empty or constant (no bandwidth).
+    """
+    counts, edges = np.histogram(values, bins=grid, range=(lo, hi))
+    step = edges[1] - edges[0]
+    x = edges[:-1] + step / 2
+    spread = values.std() if len(values) else 0.0
+    if not (spread > 0 and step > 0):
+        return x, np.zeros(grid)
+    bandwidth = spread * len(values) ** -0.2
+    sigma = bandwidth / step
+    offsets = np.arange(-int(4 * sigma) - 1, int(4 * sigma) + 2)
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+    smoothed = np.convolve(counts, kernel / kernel.sum(), mode="same")
+    return x, smoothed / (len(values) * step)
+
+
+def stratified_sample(
+    df: pd.DataFrame, column: str, per_group: int, seed: int = 0
+) -> pd.DataFrame:
+    """Up to ``per_group`` uniformly drawn rows of each ``column`` value.
+
+    Each row gets a random priority and the lowest ``per_group`` per group
+    are kept (bottom-k reservoir sampling), so small groups stay visible
+    next to large ones.
+    """
+    codes = pd.factorize(df[column])[0]
+    priority = np.random.default_rng(seed).random(len(df))
+    order = np.lexsort((priority, codes))
+    group_start = np.searchsorted(codes[order], codes[order])
+    rank = np.arange(len(order)) - group_start
+    return df.iloc[np.sort(order[rank < per_group])]
+
+
+def plot_price_distribution(
+    df: pd.DataFrame, large: Optional[bool] = None, bins: int = 40
+) -> None:
+    """Histogram of prices with a KDE; pre-binned with NumPy above LARGE_PLOT_ROWS rows."""
+    plt, sns = _plotting()
     fig, ax = plt.subplots(figsize=(8, 4))
-    sns.histplot(df["price"], bins=40, kde=True, ax=ax)
+    if _use_large_mode(df, large):
+        prices = df["price"].to_numpy(dtype=float)
+        prices = prices[np.isfinite(prices)]
+        counts, edges = np.histogram(prices, bins=bins)
+        ax.stairs(counts, edges, fill=True, alpha=0.6)
+        x, density = binned_kde(prices, edges[0], edges[-1])
+        # Scale the density to expected counts per histogram bin
+        ax.plot(x, density * len(prices) * (edges[1] - edges[0]))
+        ax.set_ylabel("Count")
+    else:
+        sns.histplot(df["price"], bins=bins, kde=True, ax=ax)
     ax.set_title("Course Price Distribution")
     ax.set_xlabel("Price")
     save_plot(fig, "price_distribution.png")
 
 
+def correlation_matrix(df: pd.DataFrame) -> pd.DataFrame:
+    return df[["price", "num_subscribers", "num_reviews"]].corr()
+
+
 def plot_corr(df: pd.DataFrame) -> None:
-    numerical = df[["price", "num_subscribers", "num_reviews"]]
-    corr = numerical.corr()
-    print("\nCorrelation Matrix:\n", corr)
+    corr = correlation_matrix(df)
+    plt, sns = _plotting()
     fig, ax = plt.subplots(figsize=(6, 4))
     sns.heatmap(corr, annot=True, cmap="coolwarm", ax=ax)
     ax.set_title("Correlation Heatmap")
     save_plot(fig, "correlation_heatmap.png")
 
 
-def plot_reviews_vs_subscribers(df: pd.DataFrame) -> None:
+def _count_edges(values: np.ndarray, n_bins: int) -> np.ndarray:
+    """About ``n_bins`` bins even in log1p space, aligned to whole numbers (for counts)."""
+    top = max(float(np.nanmax(values, initial=1.0)), 1.0)
+    steps = np.expm1(np.linspace(0.0, np.log1p(top + 1.0), n_bins + 1))
+    return np.unique(np.round(steps)) - 0.5
+
+
+def _short_count(n: int) -> str:
+    for size, suffix in ((1_000_000, "M"), (1_000, "k")):
+        if n >= size:
+            return f"{n / size:g}{suffix}"
+    return str(n)
+
+
+def _log1p_axis(ax, axis: str, top: float) -> None:
+    """log(1 + v) scaling with ticks at 0, 10, 100, 1k, ..."""
+    scale = getattr(ax, f"set_{axis}scale")
+    scale("function", functions=(lambda v: np.log1p(np.clip(v, -0.99, None)), np.expm1))
+    ticks = [0] + [10**k for k in range(1, int(np.log10(max(top, 10))) + 1)]
+    getattr(ax, f"set_{axis}ticks")(ticks, [_short_count(t) for t in ticks])
+
+
+def plot_reviews_vs_subscribers(
+    df: pd.DataFrame,
+    large: Optional[bool] = None,
+    mode: str = "density",
+    bins: int = 120,
+    per_subject: int = 5_000,
+) -> None:
+    """Reviews vs subscribers by subject.
+
+    Above LARGE_PLOT_ROWS rows (or with ``large=True``), ``mode="density"``
+    draws one log-binned 2D count raster per subject, so drawing cost depends
+    on ``bins`` rather than the row count. ``mode="sample"`` keeps the
+    scatter but plots a stratified sample of ``per_subject`` rows per subject.
+    """
+    plt, sns = _plotting()
+    if _use_large_mode(df, large) and mode == "density":
+        from matplotlib.colors import LogNorm
+
+        x = df["num_reviews"].to_numpy(dtype=float)
+        y = df["num_subscribers"].to_numpy(dtype=float)
+        x_edges, y_edges = _count_edges(x, bins), _count_edges(y, bins)
+        subjects = df["subject"].value_counts().loc[lambda c: c > 0].index
+        codes = pd.Categorical(df["subject"], categories=subjects).codes
+        rasters = [
+            np.histogram2d(x[codes == k], y[codes == k], bins=[x_edges, y_edges])[0]
+            for k in range(len(subjects))
+        ]
+        norm = LogNorm(vmin=1, vmax=max(max(r.max() for r in rasters), 1))
+
+        ncols = min(len(subjects), 2)
+        nrows = -(-len(subjects) // ncols)
+        fig, axes = plt.subplots(
+            nrows, ncols, figsize=(5 * ncols, 4 * nrows), sharex=True, sharey=True, squeeze=False
+        )
+        for ax, subject, raster in zip(axes.flat, subjects, rasters):
+            mesh = ax.pcolormesh(
+                x_edges, y_edges, np.ma.masked_equal(raster.T, 0), norm=norm, cmap="crest"
+            )
+            _log1p_axis(ax, "x", x_edges[-1])
+            _log1p_axis(ax, "y", y_edges[-1])
+            ax.set_title(str(subject))
+        for ax in axes.flat[len(subjects) :]:
+            ax.set_visible(False)
+        for ax in axes[-1]:
+            ax.set_xlabel("num_reviews")
+        for ax in axes[:, 0]:
+            ax.set_ylabel("num_subscribers")
+        fig.colorbar(mesh, ax=axes, label="Courses per bin")
+        fig.suptitle("Reviews vs Subscribers by Subject")
+        save_plot(fig, "reviews_vs_subscribers.png", tight=False)
+        return
+
+    if _use_large_mode(df, large):
+        df = stratified_sample(df, "subject", per_subject)
     fig, ax = plt.subplots(figsize=(8, 5))
     sns.scatterplot(
         data=df,
@@ -160,6 +357,143 @@ def plot_reviews_vs_subscribers(df: pd.DataFrame) -> None:
     save_plot(fig, "reviews_vs_subscribers.png")
 
 
+@dataclass(frozen=True)
+class FigureSpec:
+    """One report figure: the function that saves it and the columns it reads."""
+
+    filename: str
+    plot: Callable[..., None]
+    columns: Tuple[str, ...]
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+FIGURES = [
+    FigureSpec("subject_counts.png", plot_subject_counts, ("subject",)),
+    FigureSpec("price_distribution.png", plot_price_distribution, ("price",)),
+    FigureSpec(
+        "correlation_heatmap.png", plot_corr, ("price", "num_subscribers", "num_reviews")
+    ),
+    FigureSpec(
+        "reviews_vs_subscribers.png",
+        plot_reviews_vs_subscribers,
+        ("num_reviews", "num_subscribers", "subject"),
+    ),
+]
+RENDER_MANIFEST = ".render_manifest.json"
+# Drawing code shared by the plot functions; editing any of it re-renders every figure
+PLOT_HELPERS = (
+    _plotting,
+    save_plot,
+    _use_large_mode,
+    binned_kde,
+    stratified_sample,
+    correlation_matrix,
+    _count_edges,
+    _short_count,
+    _log1p_axis,
+)
+
+
+def figure_fingerprint(spec: FigureSpec, df: pd.DataFrame) -> str:
+    """Hash of the figure's input columns, its parameters and its plotting code.
+
+    The code is the plot function's source plus that of every PLOT_HELPERS
+    function, so a change to the theme, saving or binning also counts.
+    """
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(df[list(spec.columns)], index=False).to_numpy())
+    settings = [spec.columns, spec.params, SAVE_DPI, LARGE_PLOT_ROWS]
+    digest.update(json.dumps(settings, default=str).encode())
+    for func in (spec.plot, *PLOT_HELPERS):
+        digest.update(inspect.getsource(func).encode())
+    return digest.hexdigest()
+
+
+def _use_agg() -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def _render_figure(spec: FigureSpec, frame: pd.DataFrame) -> None:
+    _use_agg()
+    spec.plot(frame, **spec.params)
+
+
+def render_figures(
+    df: pd.DataFrame,
+    figures: Optional[List[FigureSpec]] = None,
+    parallel: Optional[ParallelConfig] = None,
+    force: bool = False,
+) -> Dict[str, str]:
+    """Save every figure whose fingerprint changed, in a process pool on the Agg backend.
+
+    Fingerprints of the last successful render are kept in OUTPUT_DIR's
+    RENDER_MANIFEST; a figure is skipped if its fingerprint matches and the
+    PNG still exists (``force`` renders everything). Workers come from the
+    parallelism config's training workers and receive only the columns
+    their figure reads. Returns filename -> "rendered" or "unchanged"; if
+    any figure fails, the others are still recorded and a RuntimeError is
+    raised after the manifest is written.
+    """
+    figures = FIGURES if figures is None else figures
+    parallel = parallel or get_config()
+    manifest_path = OUTPUT_DIR / RENDER_MANIFEST
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+
+    pending = {}
+    for spec in figures:
+        key = figure_fingerprint(spec, df)
+        current = manifest.get(spec.filename) == key and (OUTPUT_DIR / spec.filename).exists()
+        if force or not current:
+            pending[spec.filename] = (spec, key)
+
+    errors = {}
+    workers = min(parallel.train_workers, len(pending))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_use_agg) as pool:
+            futures = {
+                pool.submit(_render_figure, spec, df[list(spec.columns)]): name
+                for name, (spec, _) in pending.items()
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    errors[name] = e
+                else:
+                    manifest[name] = pending[name][1]
+    else:
+        for name, (spec, key) in pending.items():
+            try:
+                _render_figure(spec, df[list(spec.columns)])
+            except Exception as e:
+                errors[name] = e
+            else:
+                manifest[name] = key
+
+    OUTPUT_DIR.mkdir(exist_ok=True)
+    tmp = manifest_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+    os.replace(tmp, manifest_path)
+    print(
+        f"Rendered {len(pending) - len(errors)} figure(s), {len(figures) - len(pending)} "
+        f"unchanged ({max(workers, 1)} worker(s))"
+    )
+    # Failures are raised only now, so figures that did render stay recorded
+    if errors:
+        first = next(iter(errors.values()))
+        raise RuntimeError(f"{len(errors)} figure(s) failed to render: {sorted(errors)}") from first
+    return {
+        spec.filename: "rendered" if spec.filename in pending else "unchanged"
+        for spec in figures
+    }
+
+
 def prepare_ml_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
     target = "num_subscribers"
     drop_cols = ["course_title", "published_timestamp", "log_subscribers", "url"]
@@ -169,9 +503,31 @@ def prepare_ml_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
     return X, y
 
 
-def build_pipeline(X: pd.DataFrame) -> Pipeline:
-    categorical_cols = X.select_dtypes(include=["object", "bool"]).columns.tolist()
-    numeric_cols = X.select_dtypes(exclude=["object", "bool"]).columns.tolist()
+def build_pipeline(
+    X: pd.DataFrame,
+    parallel: Optional[ParallelConfig] = None,
+    n_estimators: int = 200,
+    max_depth: Optional[int] = None,
+    min_samples_leaf: int = 1,
+    backend: Optional[str] = None,
+) -> "Pipeline":
+    """Preprocessing + regressor pipeline; lower n_estimators/max_depth for a compact model.
+
+    ``backend`` names a model_backends entry (default: UDEMY_MODEL_BACKEND or
+    random_forest); n_estimators maps to boosting iterations for
+    hist_gradient_boosting.
+    """
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    parallel = parallel or get_config()
+    regressor = get_backend(backend)
+    # "string" and "category" cover Arrow-backed and compacted text columns
+    text_dtypes = ["object", "string", "category", "bool"]
+    categorical_cols = X.select_dtypes(include=text_dtypes).columns.tolist()
+    numeric_cols = X.select_dtypes(exclude=text_dtypes).columns.tolist()
 
     categorical_transformer = Pipeline(
         steps=[
@@ -190,14 +546,17 @@ def build_pipeline(X: pd.DataFrame) -> Pipeline:
         transformers=[
             ("categorical", categorical_transformer, categorical_cols),
             ("numeric", numeric_transformer, numeric_cols),
-        ]
+        ],
+        # Dense-only backends need the one-hot output densified
+        sparse_threshold=0.3 if regressor.accepts_sparse else 0.0,
     )
 
-    model = RandomForestRegressor(
-        n_estimators=200,
-        max_depth=None,
+    model = regressor.build(
+        parallel,
         random_state=42,
-        n_jobs=-1,
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        min_samples_leaf=min_samples_leaf,
     )
 
     pipe = Pipeline(
@@ -209,13 +568,22 @@ def build_pipeline(X: pd.DataFrame) -> Pipeline:
     return pipe
 
 
-def train_and_evaluate(X: pd.DataFrame, y: pd.Series) -> None:
+def train_and_evaluate(
+    X: pd.DataFrame, y: pd.Series, parallel: Optional[ParallelConfig] = None
+) -> None:
+    from sklearn.metrics import mean_absolute_error, r2_score
+    from sklearn.model_selection import train_test_split
+
+    parallel = parallel or get_config()
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42
     )
-    pipe = build_pipeline(X)
-    pipe.fit(X_train, y_train)
-    preds = pipe.predict(X_test)
+    pipe = build_pipeline(X, parallel)
+    regressor = get_backend()
+    with parallel.training(), regressor.threads(parallel):
+        pipe.fit(X_train, y_train)
+    with regressor.threads(parallel, for_inference=True):
+        preds = pipe.predict(X_test)
     mae = mean_absolute_error(y_test, preds)
     r2 = r2_score(y_test, preds)
     print("\nModel performance on hold-out set:")
@@ -231,10 +599,8 @@ if __name__ == "__main__":
     print("\n--- TEMPO 2: INTERMEDIATE ---")
     print("\nCourses per Subject:\n", df_clean["subject"].value_counts())
 
-    plot_subject_counts(df_clean)
-    plot_price_distribution(df_clean)
-    plot_corr(df_clean)
-    plot_reviews_vs_subscribers(df_clean)
+    print("\nCorrelation Matrix:\n", correlation_matrix(df_clean))
+    render_figures(df_clean)
 
     print("\n--- TEMPO 3: COMPLEX ML PREP ---")
     df_features = add_features(df_clean)